@@ -1,128 +1,578 @@
 """Module for the agent."""
 
-from typing import Dict, Any, List
+from typing import (
+    Dict, Any, List, Optional, Tuple, Union, Iterable, AsyncIterable, AsyncIterator, Callable)
+import asyncio
 import logging
+import time
 
 from agent.core.client import AnthropicClient
+from agent.core.deadline import (
+    Deadline, DeadlineExceeded, deadline_scope, iterate_with_deadline, with_deadline)
+from agent.core.events import (
+    AgentEvent, StepPlanned, PlanReady, StepStarted, StepFinished, ResponseDelta, TaskFinished)
+from agent.core.metrics import metrics, track_usage
+from agent.core.persistence import SQLiteStateStore, StateStore
+from agent.core.prompt import PromptBuilder
 from agent.core.state import AgentState, TaskStatus
+from agent.core.summarizer import ProgressiveSummarizer
+from agent.planning.fast_path import FastPathPlan, FastPathRouter
 from agent.planning.planner import TaskPlanner
 from agent.execution.executor import StepExecutor
-from tools.calculator import Calculator
-from tools.web_search import WebSearch
+from agent.execution.scheduler import PlanScheduler
+from tools.registry import ToolRegistry
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+EventCallback = Callable[[AgentEvent], None]
+
 class Agent:
     """Class for the agent."""
 
-    def __init__(self):
-        """Initialize the agent."""
-        self.state = AgentState()
+    def __init__(
+            self, max_parallel_steps: Optional[int] = None,
+            state_store: Optional[StateStore] = None):
+        """Initialize the agent.
+
+        ``max_parallel_steps`` caps how many independent plan steps run at once and
+        defaults to ``settings.max_parallel_steps``. ``state_store`` persists task
+        progress so tasks can be resumed; it defaults to a SQLite store at
+        ``settings.state_store_path`` when that is set.
+        """
+        if state_store is None and settings.state_store_path:
+            state_store = SQLiteStateStore(settings.state_store_path)
+        self.state = AgentState(store=state_store)
+        self.max_parallel_steps = max_parallel_steps or settings.max_parallel_steps
 
-        # Initialize tools
-        self.tools_registry = {}
-        self._register_default_tools()
+        # Tools are only imported and built the first time they are used
+        self.tools_registry = ToolRegistry.with_defaults()
 
         # Initialize executor with tools
         self.executor = StepExecutor(tools_registry=self.tools_registry)
         self.client = AnthropicClient(model=settings.anthropic_model)
         self.planner = TaskPlanner(tools_registry=self.tools_registry)
-
-    def _register_default_tools(self):
-        """Register default tools"""
-        calculator = Calculator()
-        web_search = WebSearch()
-        self.tools_registry[calculator.name] = calculator
-        self.tools_registry[web_search.name] = web_search
+        self.fast_path = None
+        if settings.fast_path_enabled:
+            self.fast_path = FastPathRouter(self.tools_registry)
 
     def register_tool(self, tool):
         """Register a new tool"""
         self.tools_registry[tool.name] = tool
+        self.planner.invalidate_tools()
+        if self.fast_path is not None:
+            self.fast_path.invalidate_tools()
+
+    async def process_task(
+            self, task_description: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Process a task from start to finish.
 
-    async def process_task(self, task_description: str) -> Dict[str, Any]:
-        """Process a task from start to finish"""
+        The task must finish by ``deadline``, which defaults to ``settings.task_timeout``
+        seconds from now. When time runs out, the work in flight is cancelled and the
+        result has ``status`` ``"timed_out"`` with the steps that did complete.
+        """
         # Create a new task
         task_id = self.state.create_task(task_description)
-        self.state.update_task(task_id, status=TaskStatus.PLANNING)
+        try:
+            return await self._run_task(
+                _TaskRun(task_id, task_description, deadline=self._task_deadline(deadline)))
+        except BaseException:
+            self.state.update_task(task_id, status=TaskStatus.FAILED)
+            metrics.inc("tasks_total", status="failed")
+            raise
+
+    async def resume_task(
+            self, task_id: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Finish a task that was interrupted, for example by a process restart.
 
-        # Step 1: Create a plan
-        plan = await self.planner.create_plan(task_description)
-        self.state.update_task(task_id, plan=plan, status=TaskStatus.EXECUTING)
+        The task is loaded from the state store if needed. A completed task returns its
+        stored final response without any model calls. Otherwise its stored plan is reused
+        and steps that already succeeded are not executed again; a task that never
+        got a plan is planned from scratch. ``deadline`` works as in ``process_task``.
+        """
+        task = self.state.load_task(task_id)
+        if task["status"] == TaskStatus.COMPLETED and task["final_response"] is not None:
+            logger.info("Task %s is already completed", task_id)
+            return {
+                "task_id": task_id,
+                "status": "completed",
+                "results": [
+                    {"step": step, "result": task["results"][step["step_id"]]}
+                    for step in task["plan"] if step["step_id"] in task["results"]
+                ],
+                "final_response": task["final_response"]
+            }
 
-        # Step 2: Execute each step in the plan
-        results = []
-        current_step = 0
+        # Results only line up with the plan they were produced for
+        completed = {
+            step_id: result for step_id, result in task["results"].items()
+            if task["plan"] and result.get("status") == "success"
+        }
+        logger.info(
+            "Resuming task %s with %d completed steps", task_id, len(completed))
+        try:
+            run = _TaskRun(task_id, task["description"], deadline=self._task_deadline(deadline))
+            return await self._run_task(
+                run, plan=task["plan"] or None, completed_results=completed)
+        except BaseException:
+            self.state.update_task(task_id, status=TaskStatus.FAILED)
+            metrics.inc("tasks_total", status="failed")
+            raise
 
-        for step in plan:
-            current_step += 1
-            self.state.update_task(task_id, current_step=current_step)
+    async def stream_task(
+            self, task_description: str,
+            deadline: Optional[Deadline] = None) -> AsyncIterator[AgentEvent]:
+        """Process a task, yielding events as it progresses.
+
+        Yields ``StepPlanned`` as each step of the plan is generated, ``PlanReady`` once
+        the plan is complete, ``StepStarted`` and ``StepFinished`` for every step,
+        ``ResponseDelta`` for each chunk of the final response as it is generated, and
+        finally ``TaskFinished`` with the same result dict that ``process_task``
+        returns. ``deadline`` works as in ``process_task``.
+        """
+        task_id = self.state.create_task(task_description)
+        queue: "asyncio.Queue[Optional[AgentEvent]]" = asyncio.Queue()
+        deadline = self._task_deadline(deadline)
+
+        async def run() -> None:
+            try:
+                result = await self._run_task(
+                    _TaskRun(task_id, task_description, queue.put_nowait, deadline))
+                queue.put_nowait(TaskFinished(task_id, result))
+            except BaseException:
+                self.state.update_task(task_id, status=TaskStatus.FAILED)
+                metrics.inc("tasks_total", status="failed")
+                raise
+            finally:
+                queue.put_nowait(None)
+
+        runner = asyncio.ensure_future(run())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            # Surface any exception raised while processing the task
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+
+    async def process_tasks(
+            self,
+            task_descriptions: Union[Iterable[str], AsyncIterable[str]],
+            max_concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Process many tasks concurrently, yielding each result as soon as it finishes.
+
+        At most ``max_concurrency`` tasks (default ``settings.max_concurrent_tasks``)
+        are in flight; the next description is only pulled from the input once a slot
+        frees up. Every yielded dict carries the ``index`` of its task in the input.
+        Tasks that raise are yielded with ``status`` set to ``"failed"``.
+        """
+        max_concurrency = max_concurrency or settings.max_concurrent_tasks
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
 
-            # Execute the step
-            result = await self.executor.execute_step(step, self.state)
+        if isinstance(task_descriptions, AsyncIterable):
+            source = aiter(task_descriptions)
+        else:
+            source = _aiter_sync(task_descriptions)
 
-            # Store result in state
-            step_id = step["step_id"]
-            self.state.tasks[task_id]["results"][step_id] = result
+        async def run(index: int, description: str) -> Dict[str, Any]:
+            try:
+                result = await self.process_task(description)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Task %d failed: %s", index, e, exc_info=True)
+                result = {
+                    "task_id": None,
+                    "status": "failed",
+                    "error": str(e),
+                    "results": [],
+                    "final_response": None
+                }
+            result["index"] = index
+            return result
 
-            # Save to memory
-            self.state.add_memory(
-                f"Step {step_id}: {step['description']}\nResult: {result['output']}",
-                memory_type="execution"
-            )
+        in_flight = set()
+        next_index = 0
+        exhausted = False
+        try:
+            while True:
+                # Only pull new input while there is spare capacity
+                while not exhausted and len(in_flight) < max_concurrency:
+                    try:
+                        description = await anext(source)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    in_flight.add(asyncio.ensure_future(run(next_index, description)))
+                    next_index += 1
 
-            logger.info("Step %d completed: %s", step_id, step["description"])
-            logger.info("Result: %s", result["output"])
-            results.append({
+                if not in_flight:
+                    return
+
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _run_task(
+            self, run: "_TaskRun", *, plan: Optional[List[Dict[str, Any]]] = None,
+            completed_results: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Plan and execute a task that has already been created in the state.
+
+        ``run.emit`` is called with an event at every stage of the task. A resumed
+        task passes its existing ``plan`` and the ``completed_results`` of its steps.
+
+        ``run.deadline`` is split into stage budgets: planning may use
+        ``settings.planning_budget_fraction`` of it, ``settings.summary_budget_fraction``
+        is kept back for the final response, and each step gets at most
+        ``settings.step_timeout`` seconds of what is left for execution.
+        """
+        planning_deadline, execution_deadline = _stage_deadlines(run.deadline)
+
+        # Step 1: Create a plan, streaming its steps so early ones can start right away.
+        # Tasks a single tool can answer skip the planner and the summary model call.
+        plan, steps = self._start_plan(run, plan, planning_deadline)
+
+        # Step 2: Execute the plan, running independent steps concurrently, while the
+        # summarizer folds finished steps into a running summary
+        run.step_results.update(completed_results or {})
+        if settings.progressive_summary_enabled and run.fast_plan is None:
+            run.summarizer = ProgressiveSummarizer(run.description)
+        timed_out = await self._execute_plan(
+            run, steps, completed_results, execution_deadline)
+
+        # Step 3: Summarize the steps that finished
+        results = [
+            {
                 "step": step,
-                "result": result
-            })
+                "result": run.step_results[step["step_id"]]
+            }
+            for step in plan
+            if step["step_id"] in run.step_results
+        ]
+        return await self._finish_task(run, results, timed_out)
+
+    def _start_plan(
+            self, run: "_TaskRun", plan: Optional[List[Dict[str, Any]]],
+            planning_deadline: Optional[Deadline]) -> Tuple[List[Dict[str, Any]], Any]:
+        """Return the plan and the steps to schedule, planning the task if needed.
+
+        When the planner runs, the steps are an async iterator that fills in the
+        returned plan list as they are generated.
+        """
+        if plan is None and self.fast_path is not None:
+            run.fast_plan = self.fast_path.route(run.description)
+            if run.fast_plan is not None:
+                plan = run.fast_plan.plan
+
+        if plan is None:
+            self.state.update_task(run.task_id, status=TaskStatus.PLANNING)
+            plan = []
+            return plan, self._plan_steps(
+                run.task_id, run.description, plan, run.emit, planning_deadline)
+        self.state.update_task(run.task_id, plan=plan, status=TaskStatus.EXECUTING)
+        run.emit(PlanReady(run.task_id, plan))
+        return plan, plan
+
+    async def _execute_plan(
+            self, run: "_TaskRun", steps: Any,
+            completed_results: Optional[Dict[int, Dict[str, Any]]],
+            execution_deadline: Optional[Deadline]) -> Optional[str]:
+        """Run the plan's steps, returning the stage that ran out of time, if any.
+
+        When the deadline passes, unfinished steps are cancelled and the task goes on
+        with the ones that finished.
+        """
+        async def run_step(step, dependency_results):
+            return await self._run_step(run, step, dependency_results, execution_deadline)
+
+        scheduler = PlanScheduler(run_step, max_concurrency=self.max_parallel_steps)
+        try:
+            with deadline_scope(execution_deadline):
+                await with_deadline(
+                    scheduler.run(steps, completed=completed_results),
+                    execution_deadline, "execution")
+        except DeadlineExceeded as e:
+            timed_out = "planning" if e.stage == "planning" else "execution"
+            logger.warning(
+                "Task %s ran out of time during %s after %d steps",
+                run.task_id, timed_out, len(run.step_results))
+            metrics.inc("deadline_exceeded_total", stage=timed_out)
+            if run.summarizer is not None:
+                run.summarizer.cancel()
+                run.summarizer = None
+            return timed_out
+        except BaseException:
+            if run.summarizer is not None:
+                run.summarizer.cancel()
+            raise
+        return None
 
-        # Mark task as completed
-        self.state.update_task(task_id, status=TaskStatus.COMPLETED)
+    async def _run_step(
+            self, run: "_TaskRun", step: Dict[str, Any],
+            dependency_results: Dict[int, Dict[str, Any]],
+            execution_deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Execute one step within its time budget and record its result."""
+        run.emit(StepStarted(run.task_id, step))
 
-        # Generate final response
-        final_response = await self._generate_final_response(task_id, results)
+        # Execute the step with the outputs of the steps it depends on
+        kind = "tool" if step.get("requires_tool") else "thinking"
+        start = time.perf_counter()
+        step_deadline = self._step_deadline(execution_deadline)
+        with metrics.span("step", kind=kind), track_usage() as usage, \
+                deadline_scope(step_deadline):
+            try:
+                result = await with_deadline(
+                    self.executor.execute_step(
+                        step, self.state, dependency_results, task_id=run.task_id),
+                    step_deadline, "step")
+            except DeadlineExceeded as e:
+                # Only this step ran out of time; the task goes on without it
+                if execution_deadline is not None and execution_deadline.expired:
+                    raise
+                metrics.inc("deadline_exceeded_total", stage="step")
+                result = {
+                    "status": "error",
+                    "error": str(e),
+                    "output": "Step did not finish within its time budget."
+                }
+        result["metrics"] = dict(usage.to_dict(), duration=time.perf_counter() - start)
+        metrics.inc("steps_total", kind=kind, status=result.get("status"))
+        if run.summarizer is not None:
+            run.summarizer.add(step, result)
 
-        return {
-            "task_id": task_id,
-            "status": "completed",
+        # Store result in state
+        step_id = step["step_id"]
+        run.step_results[step_id] = result
+        self.state.record_step_result(run.task_id, step_id, result)
+        self.state.update_task(run.task_id, current_step=len(run.step_results))
+
+        # Save to memory
+        self.state.add_memory(
+            f"Step {step_id}: {step['description']}\nResult: {result['output']}",
+            memory_type="execution",
+            task_id=run.task_id
+        )
+
+        logger.info("Step %d completed: %s", step_id, step["description"])
+        logger.info("Result: %s", result["output"])
+        run.emit(StepFinished(run.task_id, step, result))
+        return result
+
+    async def _finish_task(
+            self, run: "_TaskRun", results: List[Dict[str, Any]],
+            timed_out: Optional[str]) -> Dict[str, Any]:
+        """Produce the final response within what is left of the deadline and store it."""
+        with metrics.span("summary"), deadline_scope(run.deadline):
+            try:
+                final_response = await with_deadline(
+                    self._final_response(run, results, timed_out), run.deadline, "summary")
+            except DeadlineExceeded:
+                metrics.inc("deadline_exceeded_total", stage="summary")
+                timed_out = timed_out or "summary"
+                final_response = _partial_response(results)
+                run.emit(ResponseDelta(run.task_id, final_response))
+
+        # Mark task as completed, or as timed out with the steps that did finish
+        status = TaskStatus.COMPLETED if timed_out is None else TaskStatus.TIMED_OUT
+        self.state.update_task(run.task_id, status=status, final_response=final_response)
+        metrics.inc("tasks_total", status="completed" if timed_out is None else "timed_out")
+
+        result = {
+            "task_id": run.task_id,
+            "status": "completed" if timed_out is None else "timed_out",
             "results": results,
             "final_response": final_response
         }
+        if timed_out is not None:
+            result["timed_out_stage"] = timed_out
+        return result
+
+    async def _final_response(
+            self, run: "_TaskRun", results: List[Dict[str, Any]],
+            timed_out: Optional[str]) -> str:
+        """Produce the final response from a template when possible, else the model"""
+        if not results:
+            final_response = (
+                _NO_RESULTS_RESPONSE if timed_out is None else _partial_response(results))
+        elif run.fast_plan is not None and timed_out is None:
+            final_response = run.fast_plan.summarize(results)
+        elif run.summarizer is not None:
+            final_response = await run.summarizer.template_response(results)
+        else:
+            final_response = None
+        if final_response is not None:
+            run.emit(ResponseDelta(run.task_id, final_response))
+            return final_response
+        return await self._generate_final_response(
+            run.task_id, results, run.emit, run.summarizer, incomplete=timed_out is not None)
+
+    @staticmethod
+    def _task_deadline(deadline: Optional[Deadline]) -> Optional[Deadline]:
+        if deadline is None and settings.task_timeout:
+            deadline = Deadline.after(settings.task_timeout)
+        return deadline
+
+    @staticmethod
+    def _step_deadline(execution_deadline: Optional[Deadline]) -> Optional[Deadline]:
+        if not settings.step_timeout:
+            return execution_deadline
+        if execution_deadline is None:
+            return Deadline.after(settings.step_timeout)
+        return execution_deadline.budget(seconds=settings.step_timeout)
 
-    async def _generate_final_response(self, task_id: str, results: List[Dict[str, Any]]) -> str:
-        """Generate a final response summarizing the task execution"""
-        task = self.state.get_task(task_id)
+    async def _plan_steps(
+            self, task_id: str, task_description: str, plan: List[Dict[str, Any]],
+            emit: EventCallback,
+            deadline: Optional[Deadline] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the plan's steps as the planner produces them, collecting them in ``plan``.
+
+        The plan is only saved once it is complete, so an interrupted task is planned
+        again when it is resumed. If planning runs past ``deadline`` the plan ends with
+        the steps generated so far, or ``DeadlineExceeded`` is raised if there are none.
+        """
+        complete = True
+        with metrics.span("planning"):
+            try:
+                async for step in iterate_with_deadline(
+                        self.planner.stream_plan(task_description), deadline, "planning"):
+                    if not plan:
+                        self.state.update_task(task_id, status=TaskStatus.EXECUTING)
+                    plan.append(step)
+                    emit(StepPlanned(task_id, step))
+                    yield step
+            except DeadlineExceeded:
+                if not plan:
+                    raise
+                logger.warning("Planning ran out of time; running the first %d steps", len(plan))
+                metrics.inc("deadline_exceeded_total", stage="planning")
+                complete = False
+        if complete:
+            self.state.update_task(task_id, plan=plan)
+        emit(PlanReady(task_id, plan))
+
+    async def _generate_final_response(
+            self, task_id: str, results: List[Dict[str, Any]],
+            emit: EventCallback,
+            summarizer: Optional[ProgressiveSummarizer] = None,
+            incomplete: bool = False) -> str:
+        """Generate a final response summarizing the task execution, streaming its text.
+
+        With a ``summarizer``, only its running summary and the results it has not
+        folded in yet are sent, which keeps this last call short. ``incomplete`` tells
+        the model that the task ran out of time after the given steps.
+        """
+        summary = ""
+        if summarizer is not None:
+            remaining = await summarizer.settle(results)
+            summary = summarizer.summary_text(results)
+            results = remaining
+        system_prompt, user_message = self._final_prompt(
+            self.state.get_task(task_id)["description"], results, summary, incomplete)
+
+        chunks = []
+        async for text in self.client.stream_async(
+            system_prompt=system_prompt,
+            user_message=user_message
+        ):
+            chunks.append(text)
+            emit(ResponseDelta(task_id, text))
 
+        return "".join(chunks)
+
+    @staticmethod
+    def _final_prompt(
+            task_description: str, results: List[Dict[str, Any]], summary: str,
+            incomplete: bool) -> Tuple[str, str]:
+        """Build the system prompt and user message of the final response."""
         step_summaries = []
-        for _idx, result_item in enumerate(results):
+        for result_item in results:
             step = result_item["step"]
             result = result_item["result"]
+            step_summaries.append(
+                f"Step {step['step_id']}: {step['description']}\nResult: {result['output']}")
 
-            step_summaries.append(f"Step {step['step_id']}: {step['description']}")
-            step_summaries.append(f"Result: {result['output']}")
-
-        all_steps = "\n".join(step_summaries)
-
-        system_prompt = """
+        # Step outputs are cut first, longest first, then the task description
+        builder = PromptBuilder(max_tokens=settings.max_input_tokens)
+        builder.system("""
         You are an AI assistant tasked with summarizing the results of a completed task.
         Provide a concise but informative summary of what was accomplished, key findings,
         and any important conclusions.
-        """
+        """)
+        builder.add(f"Task: {task_description}", shrink_order=1, min_chars=200)
+        if summary:
+            builder.add(summary, title="Summary of completed steps")
+        builder.add_items(step_summaries, title="Steps and Results", shrink_order=0)
+        if incomplete:
+            builder.add(
+                "The task ran out of time; only the steps above were completed. "
+                "Please summarize what was accomplished and what is missing.")
+        else:
+            builder.add("Please provide a summary of this completed task.")
+        return builder.build()
 
-        user_message = f"""
-        Task: {task['description']}
 
-        Steps and Results:
-        {all_steps}
+class _TaskRun:
+    """State shared by the stages of one run of a task."""
 
-        Please provide a summary of this completed task.
-        """
+    __slots__ = (
+        "task_id", "description", "emit", "deadline", "fast_plan", "summarizer",
+        "step_results",
+    )
+
+    def __init__(
+            self, task_id: str, description: str, emit: Optional[EventCallback] = None,
+            deadline: Optional[Deadline] = None):
+        self.task_id = task_id
+        self.description = description
+        self.emit = emit or (lambda event: None)
+        self.deadline = deadline
+        self.fast_plan: Optional[FastPathPlan] = None
+        self.summarizer: Optional[ProgressiveSummarizer] = None
+        self.step_results: Dict[int, Dict[str, Any]] = {}
+
+
+def _stage_deadlines(
+        deadline: Optional[Deadline]) -> Tuple[Optional[Deadline], Optional[Deadline]]:
+    """Split a task deadline into the planning and execution deadlines.
+
+    Planning may use ``settings.planning_budget_fraction`` of the time left and
+    ``settings.summary_budget_fraction`` of it is kept back for the final response.
+    """
+    if deadline is None:
+        return None, None
+    total = deadline.remaining()
+    return (
+        deadline.budget(fraction=settings.planning_budget_fraction),
+        deadline.budget(reserve=total * settings.summary_budget_fraction),
+    )
+
+
+_NO_RESULTS_RESPONSE = "The task could not be completed; none of its steps produced a result."
+
+
+def _partial_response(results: List[Dict[str, Any]]) -> str:
+    """Final response for a task that ran out of time, built without the model."""
+    if not results:
+        return "The task could not be completed within its deadline; no steps finished."
+    lines = [
+        f"The task ran out of time after {len(results)} completed steps. Results so far:"]
+    for item in results:
+        lines.append(f"- Step {item['step']['step_id']}: {item['step']['description']}: "
+                     f"{item['result']['output']}")
+    return "\n".join(lines)
 
-        response = await self.client.complete_async(
-            system_prompt=system_prompt,
-            user_message=user_message
-        )
 
-        return response
+async def _aiter_sync(iterable: Iterable[str]) -> AsyncIterator[str]:
+    """Adapt a regular iterable to the async iterator protocol."""
+    for item in iterable:
+        yield item
@@ -1,44 +1,408 @@
 """Module for interacting with the Anthropic API."""
-from anthropic import Anthropic, AsyncAnthropic
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+import asyncio
+import logging
+import threading
+
+import httpx
+from agent.core.deadline import DeadlineExceeded, current_deadline
+from agent.core.metrics import metrics, record_usage
+from agent.core.response_cache import ResponseCache, get_response_cache
 from config.settings import settings
 
+if TYPE_CHECKING:
+    from anthropic import Anthropic, AsyncAnthropic
+
+logger = logging.getLogger(__name__)
+
+def _count_retry(request: httpx.Request) -> None:
+    # The SDK numbers its attempts in this header; anything above 0 is a retry
+    if request.headers.get("x-stainless-retry-count", "0") != "0":
+        metrics.inc("llm_retries_total")
+
+async def _count_retry_async(request: httpx.Request) -> None:
+    _count_retry(request)
+
+# Closes of replaced async clients still in flight, kept so they are not collected
+_closing: Set["asyncio.Future[None]"] = set()
+
+async def _close_quietly(client: "AsyncAnthropic") -> None:
+    try:
+        await client.close()
+    except RuntimeError as e:
+        # Raised when the client's event loop has already been closed
+        logger.debug("Could not close replaced AsyncAnthropic client: %s", e)
+
+def _close_replaced(client: "AsyncAnthropic", loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close an async client replaced because it was used from another event loop.
+
+    The close runs on the client's own loop while that loop is still running, and
+    is scheduled on the current loop otherwise.
+    """
+    if loop is not None and loop.is_running():
+        future = asyncio.run_coroutine_threadsafe(_close_quietly(client), loop)
+    else:
+        future = asyncio.ensure_future(_close_quietly(client))
+    _closing.add(future)
+    future.add_done_callback(_closing.discard)
+
+
+class ClientPool:
+    """Process-wide pool of Anthropic HTTP clients.
+
+    A single pool is shared by every ``AnthropicClient`` regardless of model, so
+    keep-alive connections are reused across the planner, executor and agent. The
+    clients, and the SDK itself, are only loaded the first time they are used.
+    """
+
+    def __init__(
+            self,
+            api_key: Optional[str] = None,
+            max_connections: Optional[int] = None,
+            max_keepalive_connections: Optional[int] = None,
+            keepalive_expiry: Optional[float] = None,
+            base_url: Optional[str] = None):
+        self.api_key = api_key or settings.anthropic_api_key
+        self.base_url = base_url or settings.anthropic_base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.anthropic_max_connections,
+            max_keepalive_connections=(
+                max_keepalive_connections or settings.anthropic_max_keepalive_connections),
+            keepalive_expiry=keepalive_expiry or settings.anthropic_keepalive_expiry,
+        )
+        self._lock = threading.Lock()
+        self._client: Optional["Anthropic"] = None
+        self._async_client: Optional["AsyncAnthropic"] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> "Anthropic":
+        """The shared synchronous client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # pylint: disable=import-outside-toplevel
+                    from anthropic import Anthropic, DefaultHttpxClient
+
+                    logger.debug("Creating shared Anthropic client")
+                    self._client = Anthropic(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        http_client=DefaultHttpxClient(
+                            limits=self.limits, event_hooks={"request": [_count_retry]}),
+                    )
+        return self._client
+
+    @property
+    def async_client(self) -> "AsyncAnthropic":
+        """The shared asynchronous client, created on first use.
+
+        Async connections are bound to the event loop that opened them, so the client
+        is rebuilt when it is first used from a different running loop, and the old
+        one is closed.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        replaced = None
+        with self._lock:
+            stale = (
+                self._async_client is not None
+                and loop is not None
+                and self._async_loop is not None
+                and loop is not self._async_loop
+            )
+            if self._async_client is None or stale:
+                # pylint: disable=import-outside-toplevel
+                from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+                logger.debug("Creating shared AsyncAnthropic client")
+                if stale:
+                    replaced = (self._async_client, self._async_loop)
+                self._async_client = AsyncAnthropic(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=self.limits, event_hooks={"request": [_count_retry_async]}),
+                )
+                self._async_loop = loop
+            elif self._async_loop is None:
+                self._async_loop = loop
+            async_client = self._async_client
+        if replaced is not None:
+            _close_replaced(*replaced)
+        return async_client
+
+    async def warm_up(self) -> None:
+        """Open a keep-alive connection to the API ahead of the first request."""
+        async_client = self.async_client
+        try:
+            # pylint: disable=protected-access
+            await async_client._client.head(str(async_client.base_url))
+            logger.debug("Warmed up connection to %s", async_client.base_url)
+        except httpx.HTTPError as e:
+            logger.warning("Connection warm-up failed: %s", e)
+
+    async def aclose(self) -> None:
+        """Close every client in the pool and release their connections."""
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+            self._async_loop = None
+        if async_client is not None:
+            await async_client.close()
+        if client is not None:
+            client.close()
+
+    def close(self) -> None:
+        """Close the synchronous client; use ``aclose`` to also close the async one."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+
+_pool: Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+def get_client_pool() -> ClientPool:
+    """Return the process-wide client pool, creating it on first use."""
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ClientPool()
+    return _pool
+
+def configure_client_pool(**kwargs) -> ClientPool:
+    """Replace the process-wide client pool with one built from ``kwargs``.
+
+    Clients of the previous pool are not closed; call ``aclose`` on it first if it
+    was already in use.
+    """
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        _pool = ClientPool(**kwargs)
+    return _pool
+
+
+SystemPrompt = Union[str, List[Dict[str, Any]]]
+
+def cacheable_system(system_prompt: SystemPrompt) -> SystemPrompt:
+    """Mark the end of a system prompt as a prompt-cache breakpoint.
+
+    Plain strings become a single text block with ``cache_control`` set, so the
+    provider can reuse the processed prefix on later calls with the same prompt.
+    Lists of blocks are passed through unchanged; callers that build their own
+    blocks place their own breakpoints.
+    """
+    if not isinstance(system_prompt, str) or not system_prompt:
+        return system_prompt
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
 class AnthropicClient:
     """Client for interacting with the Anthropic API."""
 
-    def __init__(self, model=None):
-        """Initialize the Anthropic client."""
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
+    def __init__(
+            self, model=None, pool: Optional[ClientPool] = None,
+            response_cache: Optional[ResponseCache] = None):
+        """Initialize the Anthropic client.
+
+        The underlying HTTP clients come from ``pool``, which defaults to the
+        process-wide pool, so creating an ``AnthropicClient`` is cheap. Responses are
+        looked up in and stored to ``response_cache``, which defaults to the cache
+        configured by ``RESPONSE_CACHE_MODE``.
+        """
+        self.pool = pool or get_client_pool()
         self.model = model or settings.anthropic_model
-        self.async_client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        self.response_cache = response_cache or get_response_cache()
+
+    @property
+    def client(self) -> "Anthropic":
+        """The pooled synchronous Anthropic client."""
+        return self.pool.client
+
+    @property
+    def async_client(self) -> "AsyncAnthropic":
+        """The pooled asynchronous Anthropic client."""
+        return self.pool.async_client
+
+    def _system(self, system_prompt: SystemPrompt, cache_system: Optional[bool]) -> SystemPrompt:
+        if cache_system is None:
+            cache_system = settings.prompt_caching_enabled
+        return cacheable_system(system_prompt) if cache_system else system_prompt
+
+    def _cache_request(
+            self, system_prompt, user_message, temperature, max_tokens,
+            tool: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """The fields of a call that the response cache is keyed on and records."""
+        request = {
+            "model": self.model,
+            "system": system_prompt,
+            "user": user_message,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if tool is not None:
+            request["tool"] = tool
+        return request
+
+    def _cached_response(
+            self, request: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """Return the response cache key and the cached response, if any."""
+        if self.response_cache is None:
+            return None, None
+        key = ResponseCache.make_key(request)
+        cached = self.response_cache.get(key, request["temperature"])
+        if cached is not None:
+            metrics.inc("llm_response_cache_hits_total", model=self.model)
+        return key, cached
 
-    def complete(self, system_prompt, user_message, temperature=0.7, max_tokens=1000):
-        """Synchronous completion"""
+    @staticmethod
+    def _request_options() -> Dict[str, Any]:
+        """Per-request options that keep a call within the current deadline."""
+        deadline = current_deadline()
+        if deadline is None:
+            return {}
+        if deadline.expired:
+            raise DeadlineExceeded("llm_call")
+        return {"timeout": deadline.remaining()}
+
+    def _store_response(
+            self, key: Optional[str], text: Optional[str], request: Dict[str, Any]) -> None:
+        if key is None:
+            return
+        self.response_cache.set(key, text, request["temperature"], request)
+
+    def complete(
+            self, system_prompt, user_message, temperature=0.7, max_tokens=1000,
+            cache_system: Optional[bool] = None):
+        """Synchronous completion.
+
+        The system prompt is sent as a prompt-cache breakpoint unless ``cache_system``
+        is False or prompt caching is disabled in the settings.
+        """
+        request = self._cache_request(system_prompt, user_message, temperature, max_tokens)
+        key, cached = self._cached_response(request)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_message}],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.content[0].text
+            with metrics.span("llm_call", model=self.model, mode="complete"):
+                response = self.client.messages.create(
+                    model=self.model,
+                    system=self._system(system_prompt, cache_system),
+                    messages=[{"role": "user", "content": user_message}],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **self._request_options()
+                )
+            record_usage(self.model, response.usage)
+            text = response.content[0].text
+            self._store_response(key, text, request)
+            return text
         except (ValueError, SyntaxError, TypeError) as e:
-            print(f"Error completing message: {e}")
+            logger.error("Error completing message: %s", e, exc_info=True)
             # Implement retry logic here
             return None
 
-    async def complete_async(self, system_prompt, user_message, temperature=0.7, max_tokens=1000):
-        """Asynchronous completion"""
+    async def complete_async(
+            self, system_prompt, user_message, temperature=0.7, max_tokens=1000,
+            cache_system: Optional[bool] = None):
+        """Asynchronous completion, bounded by the current deadline if there is one"""
+        request = self._cache_request(system_prompt, user_message, temperature, max_tokens)
+        key, cached = self._cached_response(request)
+        if cached is not None:
+            return cached
         try:
-            response = await self.async_client.messages.create(
-                model=self.model,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_message}],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.content[0].text
+            with metrics.span("llm_call", model=self.model, mode="complete"):
+                response = await self.async_client.messages.create(
+                    model=self.model,
+                    system=self._system(system_prompt, cache_system),
+                    messages=[{"role": "user", "content": user_message}],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **self._request_options()
+                )
+            record_usage(self.model, response.usage)
+            text = response.content[0].text
+            self._store_response(key, text, request)
+            return text
         except (ValueError, SyntaxError, TypeError) as e:
-            print(f"Error completing message: {e}")
+            logger.error("Error completing message: %s", e, exc_info=True)
             # Implement retry logic here
             return None
+
+    async def stream_async(
+            self, system_prompt, user_message, temperature=0.7,
+            max_tokens=1000, cache_system: Optional[bool] = None) -> AsyncIterator[str]:
+        """Asynchronous streaming completion, yielding text deltas as they arrive.
+
+        A cached response is yielded as a single delta.
+        """
+        request = self._cache_request(system_prompt, user_message, temperature, max_tokens)
+        key, cached = self._cached_response(request)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        try:
+            with metrics.span("llm_call", model=self.model, mode="stream"):
+                async with self.async_client.messages.stream(
+                    model=self.model,
+                    system=self._system(system_prompt, cache_system),
+                    messages=[{"role": "user", "content": user_message}],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **self._request_options()
+                ) as stream:
+                    async for text in stream.text_stream:
+                        chunks.append(text)
+                        yield text
+                    record_usage(self.model, (await stream.get_final_message()).usage)
+            self._store_response(key, "".join(chunks), request)
+        except (ValueError, SyntaxError, TypeError) as e:
+            logger.error("Error streaming message: %s", e, exc_info=True)
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    async def stream_tool_input_async(
+            self, system_prompt, user_message, tool: Dict[str, Any], temperature=0.7,
+            max_tokens=1000, cache_system: Optional[bool] = None) -> AsyncIterator[str]:
+        """Asynchronous streaming call that makes the model answer by calling ``tool``.
+
+        Yields the JSON text of the tool's input as it is generated. Any text the
+        model writes instead is yielded too, so callers parsing the output leniently
+        can still use it. A cached response is yielded as a single delta.
+        """
+        request = self._cache_request(system_prompt, user_message, temperature, max_tokens, tool)
+        key, cached = self._cached_response(request)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        try:
+            with metrics.span("llm_call", model=self.model, mode="tool"):
+                async with self.async_client.messages.stream(
+                    model=self.model,
+                    system=self._system(system_prompt, cache_system),
+                    messages=[{"role": "user", "content": user_message}],
+                    tools=[tool],
+                    tool_choice={"type": "tool", "name": tool["name"]},
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **self._request_options()
+                ) as stream:
+                    async for event in stream:
+                        if event.type == "input_json":
+                            text = event.partial_json
+                        elif event.type == "text":
+                            text = event.text
+                        else:
+                            continue
+                        chunks.append(text)
+                        yield text
+                    record_usage(self.model, (await stream.get_final_message()).usage)
+            self._store_response(key, "".join(chunks), request)
+        except (ValueError, SyntaxError, TypeError) as e:
+            logger.error("Error streaming message: %s", e, exc_info=True)
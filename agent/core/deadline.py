@@ -0,0 +1,119 @@
+"""Module for task deadlines that are split into stage budgets and passed down to every call."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+import asyncio
+import time
+
+T = TypeVar("T")
+
+class DeadlineExceeded(Exception):
+    """Raised when work is cut off because its deadline has passed."""
+
+    def __init__(self, stage: str = "task"):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+class Deadline:
+    """A point in time, on the monotonic clock, by which some work must be done.
+
+    Deadlines are enforced by cancelling the awaiting task, which cannot interrupt
+    code that holds the CPU without awaiting. CPU-bound tools therefore run in the
+    tool process pool, or on a thread that is abandoned when the deadline passes.
+    """
+
+    def __init__(self, at: float):
+        self.at = at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """A deadline ``seconds`` from now."""
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return time.monotonic() >= self.at
+
+    def timeout(self, limit: Optional[float] = None) -> float:
+        """The time left, capped at ``limit`` seconds when given."""
+        remaining = self.remaining()
+        return remaining if limit is None else min(remaining, limit)
+
+    def budget(
+            self, seconds: Optional[float] = None, fraction: Optional[float] = None,
+            reserve: float = 0.0) -> "Deadline":
+        """A deadline for one stage of the work, which never ends after this one.
+
+        The stage gets ``seconds``, or ``fraction`` of the time left, or everything
+        left when neither is given, minus ``reserve`` seconds kept back for later
+        stages.
+        """
+        at = self.at - reserve
+        if seconds is not None:
+            at = min(at, time.monotonic() + seconds)
+        if fraction is not None:
+            at = min(at, time.monotonic() + self.remaining() * fraction)
+        return Deadline(at)
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the work in progress, if there is one."""
+    return _current_deadline.get()
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make ``deadline`` the current deadline inside the block.
+
+    A scope can only shorten the deadline of an enclosing one. Tasks started inside
+    the block inherit it, and model requests and tool calls read it to bound their
+    own timeouts.
+    """
+    outer = _current_deadline.get()
+    if deadline is None or (outer is not None and outer.at <= deadline.at):
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+async def with_deadline(
+        awaitable: Awaitable[T], deadline: Optional[Deadline], stage: str) -> T:
+    """Await ``awaitable``, cancelling it and raising ``DeadlineExceeded`` in time.
+
+    Without a deadline the awaitable is simply awaited.
+    """
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, deadline.remaining())
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded(stage) from e
+
+async def iterate_with_deadline(
+        iterator: AsyncIterator[Any], deadline: Optional[Deadline],
+        stage: str) -> AsyncIterator[Any]:
+    """Yield from an async generator until it ends or ``deadline`` passes.
+
+    When the deadline passes the generator is closed, so whatever it was waiting on
+    is cancelled, and ``DeadlineExceeded`` is raised.
+    """
+    try:
+        while True:
+            try:
+                item = await with_deadline(anext(iterator), deadline, stage)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await iterator.aclose()
@@ -0,0 +1,47 @@
+"""Module defining the events emitted while an agent processes a task."""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+@dataclass
+class AgentEvent:
+    """Base class for all task events."""
+
+    task_id: str
+
+@dataclass
+class StepPlanned(AgentEvent):
+    """The planner has produced one more step; it may start before the plan is done."""
+
+    step: Dict[str, Any]
+
+@dataclass
+class PlanReady(AgentEvent):
+    """The plan for the task has been created."""
+
+    plan: List[Dict[str, Any]]
+
+@dataclass
+class StepStarted(AgentEvent):
+    """A plan step has started executing."""
+
+    step: Dict[str, Any]
+
+@dataclass
+class StepFinished(AgentEvent):
+    """A plan step has finished executing."""
+
+    step: Dict[str, Any]
+    result: Dict[str, Any]
+
+@dataclass
+class ResponseDelta(AgentEvent):
+    """A chunk of text of the final response."""
+
+    text: str
+
+@dataclass
+class TaskFinished(AgentEvent):
+    """The task is done; ``result`` is what ``Agent.process_task`` returns."""
+
+    result: Dict[str, Any]
@@ -0,0 +1,158 @@
+"""Module for the agent's bounded memory store with relevance-based retrieval."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import math
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to was with".split())
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms, dropping common stopwords."""
+    return [term for term in _TOKEN_RE.findall(text.lower()) if term not in _STOPWORDS]
+
+
+class MemoryEntry:
+    """Compact memory record with a raw epoch timestamp."""
+
+    __slots__ = ("content", "type", "task_id", "timestamp", "length")
+
+    def __init__(
+            self, content: str, memory_type: str, task_id: Optional[str],
+            timestamp: float, length: int = 0):
+        self.content = content
+        self.type = memory_type
+        self.task_id = task_id
+        self.timestamp = timestamp
+        self.length = length
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the memory in its public dict form, with a formatted timestamp."""
+        return {
+            "content": self.content,
+            "type": self.type,
+            "task_id": self.task_id,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+
+@dataclass(frozen=True)
+class BM25Params:
+    """Term frequency saturation ``k1`` and length normalization ``b`` of BM25."""
+
+    k1: float = 1.5
+    b: float = 0.75
+
+    def score(self, idf: float, freq: int, length: int, avg_length: float) -> float:
+        """Score one query term that occurs ``freq`` times in a memory of ``length`` terms."""
+        norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+        return idf * freq * (self.k1 + 1) / (freq + norm)
+
+
+class MemoryStore:
+    """Bounded memory with an inverted index for BM25 relevance retrieval.
+
+    Memories are kept in insertion order; once ``capacity`` is reached the oldest
+    memory is evicted together with its index postings. Every memory can be scoped
+    to a task so retrieval for one task never returns another task's memories.
+    """
+
+    def __init__(self, capacity: int = 10_000, bm25: Optional[BM25Params] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.bm25 = bm25 or BM25Params()
+        self._entries: "OrderedDict[int, MemoryEntry]" = OrderedDict()
+        self._by_task: Dict[Optional[str], "OrderedDict[int, None]"] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (entry.to_dict() for entry in self._entries.values())
+
+    def add(self, content: str, memory_type: str, task_id: Optional[str] = None) -> None:
+        """Store a memory, evicting the oldest one when the store is full."""
+        entry_id = self._next_id
+        self._next_id += 1
+        terms = tokenize(content)
+        self._entries[entry_id] = MemoryEntry(
+            content, memory_type, task_id, time.time(), len(terms))
+        self._by_task.setdefault(task_id, OrderedDict())[entry_id] = None
+
+        for term in terms:
+            postings = self._postings.setdefault(term, {})
+            postings[entry_id] = postings.get(entry_id, 0) + 1
+        self._total_length += len(terms)
+
+        while len(self._entries) > self.capacity:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        entry_id, entry = self._entries.popitem(last=False)
+        task_entries = self._by_task[entry.task_id]
+        del task_entries[entry_id]
+        if not task_entries:
+            del self._by_task[entry.task_id]
+
+        for term in set(tokenize(entry.content)):
+            postings = self._postings[term]
+            del postings[entry_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= entry.length
+        logger.debug("Evicted memory %d", entry_id)
+
+    def recent(self, limit: int = 10, task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` of the newest memories, oldest first."""
+        if task_id is None:
+            ids = self._entries
+        else:
+            ids = self._by_task.get(task_id, {})
+
+        recent = []
+        for entry_id in reversed(ids):
+            if len(recent) >= limit:
+                break
+            recent.append(self._entries[entry_id].to_dict())
+        recent.reverse()
+        return recent
+
+    def search(
+            self, query: str, limit: int = 10,
+            task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` memories ranked by BM25 relevance to ``query``.
+
+        Results are returned in chronological order so they read as context.
+        """
+        if not self._entries:
+            return []
+
+        total = len(self._entries)
+        avg_length = self._total_length / total or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for entry_id, freq in postings.items():
+                entry = self._entries[entry_id]
+                if task_id is not None and entry.task_id != task_id:
+                    continue
+                scores[entry_id] = scores.get(entry_id, 0.0) + self.bm25.score(
+                    idf, freq, entry.length, avg_length)
+
+        best = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [self._entries[entry_id].to_dict() for entry_id in sorted(best)]
@@ -0,0 +1,256 @@
+"""Module for collecting latency, token-usage and retry metrics of the agent."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _json_bound(value: Optional[float]) -> Any:
+    """A bucket bound as JSON can hold it, with infinity spelled ``"+Inf"``."""
+    return "+Inf" if value is not None and math.isinf(value) else value
+
+
+class Histogram:
+    """Cumulative bucket counts with a running sum, as in Prometheus."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the count, sum, mean, estimated quantiles and cumulative buckets.
+
+        A quantile or bound in the overflow bucket is the string ``"+Inf"``, since
+        JSON has no infinity.
+        """
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            cumulative.append([_json_bound(bound), seen])
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": _json_bound(self.quantile(0.5)),
+            "p95": _json_bound(self.quantile(0.95)),
+            "p99": _json_bound(self.quantile(0.99)),
+            "buckets": cumulative,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters and latency histograms.
+
+    ``span`` times a block of code into the ``<name>_seconds`` histogram and counts
+    blocks that raise in ``<name>_errors_total``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Add an observation to a histogram."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """Time the enclosed block, including any awaits inside it."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def reset(self) -> None:
+        """Drop every counter and histogram."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return every series as plain data, ready to be serialized."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(key), "value": value}
+                for name, series in sorted(self._counters.items())
+                for key, value in sorted(series.items())
+            ]
+            histograms = [
+                dict(histogram.to_dict(), name=name, labels=dict(key))
+                for name, series in sorted(self._histograms.items())
+                for key, histogram in sorted(series.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self, **kwargs) -> str:
+        """Export every series as JSON."""
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "agent_") -> str:
+        """Export every series in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        seen = set()
+        for counter in snapshot["counters"]:
+            name = prefix + counter["name"]
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(counter['labels'])} {counter['value']}")
+        for histogram in snapshot["histograms"]:
+            name = prefix + histogram["name"]
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            labels = histogram["labels"]
+            for bound, count in histogram["buckets"]:
+                bucket_labels = _format_labels(dict(labels, le=bound))
+                lines.append(f"{name}_bucket{bucket_labels} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+metrics = MetricsRegistry()
+
+
+@dataclass
+class HitCounts:
+    """Hit and miss counts of a cache or a router."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that were hits, 0.0 before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class Usage:
+    """Token usage and call counts accumulated by ``track_usage``."""
+
+    __slots__ = ("llm_calls", "input_tokens", "output_tokens", "cache_read_tokens")
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """Return the usage as a dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_current_usage: ContextVar[Optional[Usage]] = ContextVar("current_usage", default=None)
+
+@contextmanager
+def track_usage() -> Iterator[Usage]:
+    """Collect the token usage of every model call made inside the block.
+
+    Tasks started inside the block inherit the tracker, so calls they make are
+    counted as well.
+    """
+    usage = Usage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+def record_usage(model: str, usage: Any) -> None:
+    """Record the ``usage`` of a model response in the metrics and the active tracker."""
+    input_tokens = getattr(usage, "input_tokens", 0) or 0
+    output_tokens = getattr(usage, "output_tokens", 0) or 0
+    cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+    cache_written = getattr(usage, "cache_creation_input_tokens", 0) or 0
+
+    metrics.inc("llm_calls_total", model=model)
+    metrics.inc("llm_input_tokens_total", input_tokens, model=model)
+    metrics.inc("llm_output_tokens_total", output_tokens, model=model)
+    if cache_read or cache_written:
+        metrics.inc("llm_cache_read_tokens_total", cache_read, model=model)
+        metrics.inc("llm_cache_write_tokens_total", cache_written, model=model)
+        logger.debug("Prompt cache: %s tokens read, %s tokens written", cache_read, cache_written)
+
+    tracker = _current_usage.get()
+    if tracker is not None:
+        tracker.llm_calls += 1
+        tracker.input_tokens += input_tokens
+        tracker.output_tokens += output_tokens
+        tracker.cache_read_tokens += cache_read
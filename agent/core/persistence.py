@@ -0,0 +1,127 @@
+"""Module for persisting agent state so interrupted tasks can be resumed."""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+import json
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+class StateStore(ABC):
+    """Persistence backend that records task progress as it happens."""
+
+    @abstractmethod
+    def save_task(self, task: Dict[str, Any]) -> None:
+        """Insert or update a task's description, status, plan, progress and final response.
+
+        Timestamps are epoch seconds.
+        """
+
+    @abstractmethod
+    def save_step_result(self, task_id: str, step_id: int, result: Dict[str, Any]) -> None:
+        """Record the result of a plan step"""
+
+    @abstractmethod
+    def record_transition(self, task_id: str, status: str, timestamp: float) -> None:
+        """Append a status transition to the task's history"""
+
+    @abstractmethod
+    def load_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Load a task with its step results, or None if it is unknown"""
+
+    def close(self) -> None:
+        """Release the resources held by the store"""
+
+
+class SQLiteStateStore(StateStore):
+    """State store backed by a SQLite database in WAL mode.
+
+    Every call is committed immediately, so progress survives the process dying
+    at any point between two steps.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, description TEXT NOT NULL, status TEXT NOT NULL, "
+                "plan TEXT NOT NULL, current_step INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, final_response TEXT)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")]
+            if "final_response" not in columns:
+                # Databases written before final responses were stored
+                self._conn.execute("ALTER TABLE tasks ADD COLUMN final_response TEXT")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS step_results ("
+                "task_id TEXT NOT NULL, step_id INTEGER NOT NULL, result TEXT NOT NULL, "
+                "PRIMARY KEY (task_id, step_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transitions ("
+                "task_id TEXT NOT NULL, status TEXT NOT NULL, at REAL NOT NULL)"
+            )
+
+    def save_task(self, task: Dict[str, Any]) -> None:
+        status = getattr(task["status"], "value", task["status"])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks "
+                "(id, description, status, plan, current_step, created_at, updated_at, "
+                "final_response) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    task["id"], task["description"], status,
+                    json.dumps(task["plan"], default=str), task["current_step"],
+                    task["created_at"], task["updated_at"], task.get("final_response"),
+                ),
+            )
+
+    def save_step_result(self, task_id: str, step_id: int, result: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO step_results (task_id, step_id, result) VALUES (?, ?, ?)",
+                (task_id, step_id, json.dumps(result, default=str)),
+            )
+
+    def record_transition(self, task_id: str, status: str, timestamp: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO transitions (task_id, status, at) VALUES (?, ?, ?)",
+                (task_id, status, timestamp),
+            )
+
+    def load_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT description, status, plan, current_step, created_at, updated_at, "
+                "final_response FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return None
+            result_rows = self._conn.execute(
+                "SELECT step_id, result FROM step_results WHERE task_id = ?",
+                (task_id,)).fetchall()
+
+        description, status, plan, current_step, created_at, updated_at, final_response = row
+        logger.debug("Loaded task %s with %d step results", task_id, len(result_rows))
+        return {
+            "id": task_id,
+            "description": description,
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "plan": json.loads(plan),
+            "current_step": current_step,
+            "results": {step_id: json.loads(result) for step_id, result in result_rows},
+            "final_response": final_response,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
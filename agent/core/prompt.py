@@ -0,0 +1,133 @@
+"""Module for assembling LLM prompts within a token budget."""
+
+from typing import List, Optional, Sequence, Tuple
+import logging
+import math
+import re
+import textwrap
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " ...[truncated]"
+
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+\n")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+def normalize_whitespace(text: str) -> str:
+    """Remove source-code indentation, trailing spaces and runs of blank lines."""
+    text = textwrap.dedent(text).strip()
+    text = _TRAILING_SPACE_RE.sub("\n", text)
+    return _BLANK_LINES_RE.sub("\n\n", text)
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate of the number of tokens in ``text``."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate(text: str, max_chars: int) -> str:
+    """Cut ``text`` to at most ``max_chars`` characters, marking the cut."""
+    if len(text) <= max_chars:
+        return text
+    keep = max(0, max_chars - len(TRUNCATION_MARKER))
+    return text[:keep].rstrip() + TRUNCATION_MARKER
+
+
+class _Section:
+    """A titled part of the user message, made of one or more items."""
+
+    def __init__(
+            self, title: Optional[str], items: List[str], shrink_order: Optional[int],
+            min_chars: int):
+        self.title = title
+        self.items = items
+        self.shrink_order = shrink_order
+        self.min_chars = min_chars
+
+    def render(self) -> str:
+        body = "\n".join(self.items)
+        return f"{self.title}:\n{body}" if self.title else body
+
+    def body_chars(self) -> int:
+        return sum(len(item) for item in self.items)
+
+    def shrink_to(self, max_chars: int) -> None:
+        """Cap the items so their total length fits in ``max_chars``.
+
+        The longest items are cut first: every item is capped at the same length,
+        chosen as large as the budget allows.
+        """
+        max_chars = max(max_chars, self.min_chars)
+        lengths = sorted(len(item) for item in self.items)
+        cap = max_chars
+        remaining = max_chars
+        for index, length in enumerate(lengths):
+            share = remaining // (len(lengths) - index)
+            if length > share:
+                cap = share
+                break
+            remaining -= length
+        self.items = [truncate(item, cap) for item in self.items]
+
+
+class PromptBuilder:
+    """Builds a system prompt and user message that fit a token budget.
+
+    Text is whitespace-normalized as it is added. When the estimated size of the
+    whole request exceeds ``max_tokens``, sections added with a ``shrink_order`` are
+    truncated, lowest ``shrink_order`` first and longest items first, until it fits
+    or every shrinkable section is at its ``min_chars``. Sections without a
+    ``shrink_order`` are never changed.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens
+        self._system = ""
+        self._sections: List[_Section] = []
+
+    def system(self, text: str) -> "PromptBuilder":
+        """Set the system prompt."""
+        self._system = normalize_whitespace(text)
+        return self
+
+    def add(
+            self, text: str, title: Optional[str] = None,
+            shrink_order: Optional[int] = None, min_chars: int = 0) -> "PromptBuilder":
+        """Add a section of free text to the user message."""
+        return self.add_items([text], title, shrink_order, min_chars)
+
+    def add_items(
+            self, items: Sequence[str], title: Optional[str] = None,
+            shrink_order: Optional[int] = None, min_chars: int = 0) -> "PromptBuilder":
+        """Add a section made of several items, such as step results."""
+        items = [normalize_whitespace(item) for item in items]
+        self._sections.append(_Section(title, items, shrink_order, min_chars))
+        return self
+
+    def _total_tokens(self) -> int:
+        return estimate_tokens(self._system) + estimate_tokens(self._render_user())
+
+    def _render_user(self) -> str:
+        return "\n\n".join(section.render() for section in self._sections if section.items)
+
+    def build(self) -> Tuple[str, str]:
+        """Return ``(system_prompt, user_message)`` fitted to the budget."""
+        if self.max_tokens is not None:
+            shrinkable = sorted(
+                (section for section in self._sections if section.shrink_order is not None),
+                key=lambda section: section.shrink_order)
+            for section in shrinkable:
+                excess = self._total_tokens() - self.max_tokens
+                if excess <= 0:
+                    break
+                before = section.body_chars()
+                section.shrink_to(before - excess * CHARS_PER_TOKEN)
+                logger.debug(
+                    "Shrunk prompt section %r from %d to %d characters",
+                    section.title, before, section.body_chars())
+
+            if self._total_tokens() > self.max_tokens:
+                logger.warning(
+                    "Prompt of ~%d tokens exceeds the budget of %d tokens",
+                    self._total_tokens(), self.max_tokens)
+
+        return self._system, self._render_user()
@@ -0,0 +1,203 @@
+"""Module for caching model responses on disk for reuse, recording and offline replay."""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from agent.core.metrics import HitCounts
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "read_through", "record", "replay")
+
+class ResponseCacheMiss(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+@dataclass
+class _Index:
+    """Sizes of the cached files, least recently used first, and the texts read so far."""
+
+    sizes: "OrderedDict[str, int]" = field(default_factory=OrderedDict)
+    texts: Dict[str, str] = field(default_factory=dict)
+    total_bytes: int = 0
+
+    def put(self, key: str, size: int) -> None:
+        """Record a file of ``size`` bytes as the most recently used."""
+        self.total_bytes += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+        self.sizes.move_to_end(key)
+
+    def pop(self, key: str) -> None:
+        """Forget a file and its text."""
+        self.total_bytes -= self.sizes.pop(key, 0)
+        self.texts.pop(key, None)
+
+
+class ResponseCache:
+    """Content-addressed store of model responses, capped in size with LRU eviction.
+
+    Each response is a JSON file named after the SHA-256 of its request, so the
+    same request always maps to the same file and a cache directory can be checked
+    in as a fixture. Responses are also kept in memory once read.
+
+    Modes:
+
+    - ``read_through``: serve cached responses and store new ones, but only for
+      requests with a temperature of at most ``max_temperature``.
+    - ``record``: always call the model and store every response.
+    - ``replay``: never call the model; a missing response raises
+      ``ResponseCacheMiss``.
+    """
+
+    def __init__(
+            self, directory: str, mode: str = "read_through",
+            max_bytes: int = 256 * 1024 * 1024, max_temperature: float = 0.3):
+        if mode not in MODES or mode == "off":
+            raise ValueError(f"Unsupported response cache mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_temperature = max_temperature
+        self._lock = threading.Lock()
+        self._index = _Index()
+        self.counts = HitCounts()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_index(self) -> None:
+        """Index existing files, least recently used first."""
+        files = []
+        for root, _dirs, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(root, name))
+                    files.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _mtime, key, size in sorted(files):
+            self._index.put(key, size)
+        logger.debug(
+            "Loaded response cache index with %d entries (%d bytes)",
+            len(self._index.sizes), self._index.total_bytes)
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """Build the content address of a request.
+
+        ``request`` holds the ``model``, ``system`` prompt, ``user`` message,
+        ``temperature`` and ``max_tokens`` of the call, and the ``tool`` it must call
+        if any.
+        """
+        fields = [
+            request["model"], request["system"], request["user"], request["temperature"],
+            request["max_tokens"]]
+        if request.get("tool") is not None:
+            fields.append(request["tool"])
+        payload = json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cacheable(self, temperature: float) -> bool:
+        return self.mode != "read_through" or temperature <= self.max_temperature
+
+    def get(self, key: str, temperature: float) -> Optional[str]:
+        """Return the cached response for ``key``, or None if the model must be called.
+
+        Raises ``ResponseCacheMiss`` in replay mode when there is no response.
+        """
+        if self.mode == "record" or not self._cacheable(temperature):
+            return None
+
+        with self._lock:
+            text = self._index.texts.get(key)
+            if text is None and key in self._index.sizes:
+                try:
+                    with open(self._path(key), encoding="utf-8") as f:
+                        text = json.load(f)["text"]
+                    self._index.texts[key] = text
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("Dropping unreadable cached response %s: %s", key, e)
+                    self._remove(key)
+            if text is None:
+                self.counts.misses += 1
+            else:
+                self.counts.hits += 1
+                self._index.sizes.move_to_end(key)
+                try:
+                    os.utime(self._path(key))
+                except OSError:
+                    pass
+
+        if text is None and self.mode == "replay":
+            raise ResponseCacheMiss(f"No recorded response for request {key}")
+        return text
+
+    def set(
+            self, key: str, text: Optional[str], temperature: float,
+            request: Optional[Dict[str, Any]] = None) -> None:
+        """Store a response; failed calls (``None``) are never stored."""
+        if text is None or self.mode == "replay" or not self._cacheable(temperature):
+            return
+
+        data = json.dumps({"request": request, "text": text}, default=str)
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            self._index.put(key, len(data.encode("utf-8")))
+            self._index.texts[key] = text
+
+            while self._index.total_bytes > self.max_bytes and len(self._index.sizes) > 1:
+                oldest = next(iter(self._index.sizes))
+                logger.debug("Evicting cached response %s", oldest)
+                self._remove(oldest)
+
+    def _remove(self, key: str) -> None:
+        self._index.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the mode, hit and miss counts and the size of the cache."""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "hits": self.counts.hits,
+                "misses": self.counts.misses,
+                "entries": len(self._index.sizes),
+                "bytes": self._index.total_bytes,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when it is turned off."""
+    global _cache  # pylint: disable=global-statement
+    if settings.response_cache_mode == "off":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    settings.response_cache_dir,
+                    mode=settings.response_cache_mode,
+                    max_bytes=settings.response_cache_max_bytes,
+                    max_temperature=settings.response_cache_max_temperature,
+                )
+    return _cache
@@ -1,11 +1,16 @@
 """Module for managing the state of the agent."""
 
+import time
 import uuid
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from enum import Enum
 import logging
 
+from agent.core.memory import MemoryStore
+from agent.core.persistence import StateStore
+from config.settings import settings
+
 logger = logging.getLogger(__name__)
 
 class TaskStatus(str, Enum):
@@ -15,33 +20,108 @@ class TaskStatus(str, Enum):
     PLANNING = "PLANNING"
     EXECUTING = "EXECUTING"
     COMPLETED = "COMPLETED"
+    TIMED_OUT = "TIMED_OUT"
     FAILED = "FAILED"
 
+def format_timestamp(timestamp: float) -> str:
+    """Format an epoch timestamp as a local ISO 8601 string."""
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+class TaskProgress:
+    """What has been worked out for a task so far: its plan, step results and answer."""
+
+    __slots__ = ("plan", "current_step", "results", "final_response")
+
+    def __init__(
+            self, plan: Optional[List[Dict[str, Any]]] = None, current_step: int = 0,
+            results: Optional[Dict[int, Dict[str, Any]]] = None,
+            final_response: Optional[str] = None):
+        self.plan = plan if plan is not None else []
+        self.current_step = current_step
+        self.results = results if results is not None else {}
+        self.final_response = final_response
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the progress fields; ``plan`` and ``results`` are not copies."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TaskRecord:
+    """Compact record of a task.
+
+    Fields live in ``__slots__`` instead of a per-task dict, and timestamps are raw
+    epoch seconds that are only formatted when the task is read via ``to_dict``.
+    """
+
+    __slots__ = ("id", "description", "status", "created_at", "updated_at", "progress")
+
+    def __init__(
+            self, task_id: str, description: str, created_at: Optional[float] = None,
+            progress: Optional[TaskProgress] = None):
+        self.id = task_id
+        self.description = description
+        self.status = TaskStatus.PENDING
+        self.created_at = created_at if created_at is not None else time.time()
+        self.updated_at = self.created_at
+        self.progress = progress if progress is not None else TaskProgress()
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "TaskRecord":
+        """Rebuild a task from the fields a state store returned for it."""
+        progress = TaskProgress(
+            row["plan"], row["current_step"], row["results"], row.get("final_response"))
+        task = cls(row["id"], row["description"], row["created_at"], progress)
+        task.status = TaskStatus(row["status"])
+        task.updated_at = row["updated_at"]
+        return task
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the task in its public dict form, with formatted timestamps.
+
+        ``plan`` and ``results`` are the record's own objects, not copies.
+        """
+        task = self.to_row()
+        task["created_at"] = format_timestamp(self.created_at)
+        task["updated_at"] = format_timestamp(self.updated_at)
+        return task
+
+    def to_row(self) -> Dict[str, Any]:
+        """Return the task's raw field values, as written to a state store."""
+        return {
+            "id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            **self.progress.to_dict(),
+        }
+
 class AgentState:
     """Class for managing the state of the agent."""
 
-    def __init__(self):
-        """Initialize the agent state."""
+    def __init__(
+            self, memory_capacity: Optional[int] = None, store: Optional[StateStore] = None):
+        """Initialize the agent state.
+
+        ``memory_capacity`` bounds the number of memories kept and defaults to
+        ``settings.memory_capacity``. When a ``store`` is given, every task change,
+        status transition and step result is persisted as it happens.
+        """
         logger.debug("Initializing AgentState")
-        self.tasks: Dict[str, Dict[str, Any]] = {}
-        self.memory: List[Dict[str, Any]] = []
+        self.store = store
+        self.tasks: Dict[str, TaskRecord] = {}
+        self.memory = MemoryStore(capacity=memory_capacity or settings.memory_capacity)
         self.current_task_id: Optional[str] = None
 
     def create_task(self, description: str) -> str:
         """Create a new task."""
         task_id = str(uuid.uuid4())
         logger.info("Creating new task: %s", description)
-        self.tasks[task_id] = {
-            "id": task_id,
-            "description": description,
-            "status": TaskStatus.PENDING,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-            "plan": [],
-            "current_step": 0,
-            "results": {},
-        }
+        task = self.tasks[task_id] = TaskRecord(task_id, description)
         self.current_task_id = task_id
+        if self.store is not None:
+            self.store.save_task(task.to_row())
+            self.store.record_transition(task_id, TaskStatus.PENDING.value, task.created_at)
         logger.debug("Task created with ID: %s", task_id)
         return task_id
 
@@ -54,28 +134,66 @@ class AgentState:
         logger.debug("Updating task %s with: %s", task_id, updates)
         task = self.tasks[task_id]
         for key, value in updates.items():
-            if key in task:
-                task[key] = value
+            if key in TaskProgress.__slots__:
+                setattr(task.progress, key, value)
+            elif key in TaskRecord.__slots__:
+                setattr(task, key, value)
 
-        task["updated_at"] = datetime.now().isoformat()
+        task.updated_at = time.time()
+        if self.store is not None:
+            self.store.save_task(task.to_row())
+            if "status" in updates:
+                self.store.record_transition(
+                    task_id, TaskStatus(updates["status"]).value, task.updated_at)
         logger.info("Task %s updated successfully", task_id)
 
-    def add_memory(self, content: str, memory_type: str = "observation") -> None:
-        """Add a memory to the agent's memory."""
+    def record_step_result(self, task_id: str, step_id: int, result: Dict[str, Any]) -> None:
+        """Store the result of a plan step."""
+        if task_id not in self.tasks:
+            logger.error("Task %s not found", task_id)
+            raise ValueError(f"Task {task_id} not found")
+
+        self.tasks[task_id].progress.results[step_id] = result
+        if self.store is not None:
+            self.store.save_step_result(task_id, step_id, result)
+        logger.debug("Recorded result of step %s for task %s", step_id, task_id)
+
+    def load_task(self, task_id: str) -> Dict[str, Any]:
+        """Get a task, loading it from the state store if it is not in memory."""
+        if task_id not in self.tasks and self.store is not None:
+            row = self.store.load_task(task_id)
+            if row is not None:
+                self.tasks[task_id] = TaskRecord.from_row(row)
+                logger.info("Loaded task %s from the state store", task_id)
+        return self.get_task(task_id)
+
+    def add_memory(
+            self, content: str, memory_type: str = "observation",
+            task_id: Optional[str] = None) -> None:
+        """Add a memory to the agent's memory, optionally scoped to a task."""
         logger.debug("Adding memory of type %s", memory_type)
-        self.memory.append({
-            "content": content,
-            "type": memory_type,
-            "timestamp": datetime.now().isoformat()
-        })
+        self.memory.add(content, memory_type, task_id)
         logger.debug("Memory added. Total memories: %d", len(self.memory))
 
-    def get_recent_memory(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get the recent memory of the agent."""
-        recent = self.memory[-limit:] if self.memory else []
+    def get_recent_memory(
+            self, limit: int = 10, task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the recent memory of the agent.
+
+        When ``task_id`` is given only memories recorded for that task are returned,
+        so concurrently running tasks do not see each other's context.
+        """
+        recent = self.memory.recent(limit, task_id)
         logger.debug("Retrieved %d recent memories", len(recent))
         return recent
 
+    def search_memory(
+            self, query: str, limit: int = 10,
+            task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the memories most relevant to ``query``, optionally scoped to a task."""
+        relevant = self.memory.search(query, limit, task_id)
+        logger.debug("Retrieved %d relevant memories", len(relevant))
+        return relevant
+
     def get_task(self, task_id: Optional[str] = None) -> Dict[str, Any]:
         """Get a task by id."""
         if task_id is None:
@@ -86,4 +204,4 @@ class AgentState:
             raise ValueError(f"Task {task_id} not found")
 
         logger.debug("Retrieved task %s", task_id)
-        return self.tasks[task_id]
+        return self.tasks[task_id].to_dict()
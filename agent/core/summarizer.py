@@ -0,0 +1,152 @@
+"""Module for summarizing a task's step results while the task is still running."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+
+from agent.core.client import AnthropicClient
+from agent.core.metrics import metrics
+from agent.core.prompt import PromptBuilder
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+def _format_output(output: Any) -> str:
+    """Render a tool output for a templated summary line."""
+    if isinstance(output, dict) and set(output) == {"result"}:
+        output = output["result"]
+    if isinstance(output, str):
+        return output
+    return json.dumps(output)
+
+@dataclass
+class _FoldState:
+    """Thinking-step results waiting for, or inside, the background fold."""
+
+    pending: List[Dict[str, Any]] = field(default_factory=list)
+    in_flight: List[Dict[str, Any]] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+    folded_ids: Set[Any] = field(default_factory=set)
+    count: int = 0
+
+
+class ProgressiveSummarizer:
+    """Keeps a running summary of a task up to date as its steps finish.
+
+    The outputs of thinking steps are folded into the summary by the fast model in
+    the background, batching whatever arrived while the previous fold was running.
+    Tool outputs are recorded as templated lines and never need a model call. At
+    the end, only the short summary and any result that was not folded yet are left
+    for the final response; if the last step was a tool step and everything else
+    was folded, the final response is filled in from a template instead.
+    """
+
+    def __init__(
+            self, task_description: str, client: Optional[AnthropicClient] = None,
+            max_words: Optional[int] = None):
+        self.task_description = task_description
+        self.client = client or AnthropicClient(model=settings.fast_model)
+        self.max_words = max_words or settings.progressive_summary_max_words
+        self.summary = ""
+        self._tool_lines: Dict[Any, str] = {}
+        self._folds = _FoldState()
+        self._last_step: Optional[Dict[str, Any]] = None
+
+    def add(self, step: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Record a finished step, starting a background fold for thinking steps."""
+        self._last_step = step
+        if step.get("requires_tool"):
+            self._tool_lines[step["step_id"]] = (
+                f"- {step['description']}: {_format_output(result.get('output'))}")
+            return
+        folds = self._folds
+        folds.pending.append({"step": step, "result": result})
+        if folds.task is None or folds.task.done():
+            folds.task = asyncio.ensure_future(self._fold_pending())
+
+    async def _fold_pending(self) -> None:
+        folds = self._folds
+        while folds.pending:
+            folds.in_flight, folds.pending = folds.pending, []
+            try:
+                with metrics.span("summary_fold"):
+                    self.summary = await self._fold(folds.in_flight)
+            # pylint: disable-next=broad-exception-caught
+            except Exception as e:  # folding is best effort, the raw results remain
+                logger.warning("Could not fold step results into the summary: %s", e)
+            else:
+                folds.folded_ids.update(item["step"]["step_id"] for item in folds.in_flight)
+                folds.count += 1
+            folds.in_flight = []
+
+    async def _fold(self, items: List[Dict[str, Any]]) -> str:
+        builder = PromptBuilder(max_tokens=settings.max_input_tokens)
+        builder.system(f"""
+        You maintain a running summary of a task that is still in progress. Merge the
+        new step results into the summary so far. Keep every key number, finding and
+        conclusion, and keep the summary under {self.max_words} words.
+        Return only the updated summary.
+        """)
+        builder.add(f"Task: {self.task_description}", shrink_order=1, min_chars=200)
+        if self.summary:
+            builder.add(self.summary, title="Summary so far")
+        builder.add_items(
+            [f"Step {item['step']['step_id']}: {item['step']['description']}\n"
+             f"Result: {item['result']['output']}" for item in items],
+            title="New step results", shrink_order=0)
+        system_prompt, user_message = builder.build()
+        response = await self.client.complete_async(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            temperature=settings.planning_temperature,
+            max_tokens=self.max_words * 2,
+        )
+        return response.strip()
+
+    async def settle(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Stop folding and return the results the summary does not cover yet.
+
+        A fold that is still running is cancelled rather than awaited: passing its
+        results on to the final call directly is quicker than waiting for the fold
+        and then making the final call anyway.
+        """
+        self._folds.pending = []
+        self.cancel()
+        if self._folds.task is not None:
+            try:
+                await self._folds.task
+            except asyncio.CancelledError:
+                pass
+        covered = self._folds.folded_ids | set(self._tool_lines)
+        return [item for item in results if item["step"]["step_id"] not in covered]
+
+    def summary_text(self, results: List[Dict[str, Any]]) -> str:
+        """The running summary followed by the tool results in plan order."""
+        order = [item["step"]["step_id"] for item in results]
+        lines = [self._tool_lines[step_id] for step_id in order if step_id in self._tool_lines]
+        parts = [self.summary] if self.summary else []
+        if lines:
+            parts.append("Results:\n" + "\n".join(lines))
+        return "\n\n".join(parts)
+
+    async def template_response(self, results: List[Dict[str, Any]]) -> Optional[str]:
+        """Return a templated final response, or None if it needs a model call."""
+        remaining = await self.settle(results)
+        if remaining or self._last_step is None or not self._last_step.get("requires_tool"):
+            return None
+        return self.summary_text(results)
+
+    def cancel(self) -> None:
+        """Stop a running fold, for example because the task failed."""
+        if self._folds.task is not None:
+            self._folds.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters for the summarizer."""
+        return {
+            "folds": self._folds.count,
+            "folded_steps": len(self._folds.folded_ids),
+            "tool_steps": len(self._tool_lines),
+        }
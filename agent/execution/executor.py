@@ -1,23 +1,53 @@
 """Module for executing individual steps in a task plan, including tool execution and reasoning."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import asyncio
 import logging
 
 from agent.core.client import AnthropicClient
+from agent.core.deadline import current_deadline, with_deadline
+from agent.core.metrics import metrics
+from agent.core.prompt import PromptBuilder
 from agent.core.state import AgentState
+from agent.execution.process_pool import ToolProcessPool, ToolWorkerError, ToolWorkerStartError
+from agent.execution.router import ModelRouter
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 class StepExecutor:
-    def __init__(self, tools_registry=None):
+    def __init__(
+            self, tools_registry=None, router: Optional[ModelRouter] = None,
+            process_pool: Optional[ToolProcessPool] = None):
+        """Initialize the executor.
+
+        Thinking steps go through ``router``, which defaults to a fast-to-strong
+        model cascade when ``settings.model_cascade_enabled`` is set, and straight to
+        ``settings.anthropic_model`` otherwise. Tools marked ``cpu_bound`` run in
+        ``process_pool``, created when ``settings.tool_process_pool_enabled`` is set;
+        all other tools run in-process.
+        """
         logger.debug("Initializing StepExecutor")
         self.client = AnthropicClient(model=settings.anthropic_model)
-        self.tools_registry = tools_registry or {}
-        logger.debug("Registered %d tools", len(self.tools_registry))
-
-    async def execute_step(self, step: Dict[str, Any], state: AgentState) -> Dict[str, Any]:
-        """Execute a single step from the plan"""
+        self.router = router
+        if self.router is None and settings.model_cascade_enabled:
+            self.router = ModelRouter()
+        self.process_pool = process_pool
+        if self.process_pool is None and settings.tool_process_pool_enabled:
+            self.process_pool = ToolProcessPool()
+        self.tools_registry = tools_registry if tools_registry is not None else {}
+
+    async def execute_step(
+            self, step: Dict[str, Any], state: AgentState,
+            dependency_results: Optional[Dict[int, Dict[str, Any]]] = None,
+            task_id: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a single step from the plan.
+
+        ``dependency_results`` holds the results of the steps listed in the step's
+        ``depends_on``. When it holds any results, thinking steps use them as their
+        context; otherwise they search the agent's memory. ``task_id`` scopes that
+        memory to the task the step belongs to.
+        """
         logger.info(
             "Executing step %s: %s", step.get('step_id', 'unknown'), step.get('description', ''))
 
@@ -26,7 +56,7 @@ class StepExecutor:
             return await self._execute_tool_step(step, state)
 
         logger.debug("Step requires thinking/reasoning")
-        return await self._execute_thinking_step(step, state)
+        return await self._execute_thinking_step(step, state, dependency_results, task_id)
 
     async def _execute_tool_step(self, step: Dict[str, Any], _state: AgentState) -> Dict[str, Any]:
         """Execute a step that requires an external tool"""
@@ -45,7 +75,8 @@ class StepExecutor:
         try:
             tool = self.tools_registry[tool_name]
             logger.debug("Found tool %s, executing...", tool_name)
-            result = await tool.execute(tool_parameters)
+            with metrics.span("tool_call", tool=tool_name):
+                result = await self._run_tool(tool, tool_parameters)
             logger.info("Tool %s executed successfully", tool_name)
 
             return {
@@ -55,7 +86,7 @@ class StepExecutor:
                 "tool_parameters": tool_parameters
             }
 
-        except (ValueError, SyntaxError, TypeError) as e:
+        except (ValueError, SyntaxError, TypeError, ToolWorkerError) as e:
             logger.error("Error executing tool %s: %s", tool_name, e, exc_info=True)
             return {
                 "status": "error",
@@ -65,41 +96,82 @@ class StepExecutor:
                 "tool_parameters": tool_parameters
             }
 
+    async def _run_tool(self, tool: Any, parameters: Dict[str, Any]) -> Any:
+        """Run a tool in the process pool if it is CPU-bound, otherwise in-process.
+
+        If the pool cannot start a worker, it is shut down and every later call
+        runs in-process, where only the tools' own limits apply. Without a pool, a
+        CPU-bound tool under a deadline runs on a thread so the event loop stays free
+        to enforce the deadline; the thread cannot be stopped, so when the deadline
+        passes its result is dropped while it finishes in the background.
+        """
+        if self.process_pool is not None and tool.cpu_bound:
+            try:
+                return await self.process_pool.run(tool, parameters)
+            except ToolWorkerStartError as e:
+                logger.error(
+                    "Tool process pool disabled, CPU-bound tools now run in-process "
+                    "without time or memory limits: %s", e)
+                metrics.inc("tool_pool_fallbacks_total")
+                self.process_pool.close()
+                self.process_pool = None
+        deadline = current_deadline()
+        if deadline is not None and tool.cpu_bound:
+            call = asyncio.to_thread(asyncio.run, tool.execute(parameters))
+        else:
+            call = tool.execute(parameters)
+        return await with_deadline(call, deadline, "tool_call")
+
     async def _execute_thinking_step(
-            self, step: Dict[str, Any], state: AgentState) -> Dict[str, Any]:
+            self, step: Dict[str, Any], state: AgentState,
+            dependency_results: Optional[Dict[int, Dict[str, Any]]] = None,
+            task_id: Optional[str] = None) -> Dict[str, Any]:
         """Execute a step that requires thinking/reasoning without using external tools."""
         logger.debug("Starting thinking step execution")
 
-        # Get context from recent memory
-        recent_memory = state.get_recent_memory()
-        memory_context = "\n".join([f"{mem['type']}: {mem['content']}" for mem in recent_memory])
-        logger.debug("Retrieved %d recent memories", len(recent_memory))
-
-        system_prompt = """
+        if dependency_results:
+            # Only the outputs of the steps this one depends on
+            context_items = [
+                f"Step {dep_id} result: {result['output']}"
+                for dep_id, result in dependency_results.items()
+            ]
+            logger.debug("Using results of %d dependency steps", len(dependency_results))
+        else:
+            # Get context from the memories most relevant to this step
+            limit = settings.memory_context_limit
+            memories = state.search_memory(step["description"], limit=limit, task_id=task_id)
+            if not memories:
+                memories = state.get_recent_memory(limit=limit, task_id=task_id)
+            context_items = [f"{mem['type']}: {mem['content']}" for mem in memories]
+            logger.debug("Retrieved %d memories", len(memories))
+
+        builder = PromptBuilder(max_tokens=settings.max_input_tokens)
+        builder.system("""
         You are an AI assistant executing a specific step in a larger plan.
         Your job is to complete this step by thinking through the problem and providing a solution.
         Be thorough, precise, and focus only on completing the assigned step.
-        """
-
-        user_message = f"""
-        Step to execute: {step['description']}
-
-        Recent context:
-        {memory_context}
-
-        Complete this step by providing your analysis, reasoning, or conclusion.
-        """
+        """)
+        builder.add(f"Step to execute: {step['description']}")
+        builder.add_items(context_items, title="Recent context", shrink_order=0)
+        builder.add("Complete this step by providing your analysis, reasoning, or conclusion.")
+        system_prompt, user_message = builder.build()
 
         logger.debug("Sending request to LLM for thinking step")
-        response = await self.client.complete_async(
-            system_prompt=system_prompt,
-            user_message=user_message,
-            temperature=settings.execution_temperature
-        )
-        logger.info("Thinking step completed successfully")
+        if self.router is not None:
+            response, model = await self.router.complete(
+                step, system_prompt, user_message, settings.execution_temperature)
+        else:
+            model = self.client.model
+            response = await self.client.complete_async(
+                system_prompt=system_prompt,
+                user_message=user_message,
+                temperature=settings.execution_temperature
+            )
+        logger.info("Thinking step completed successfully with %s", model)
 
         return {
             "status": "success",
             "output": response,
-            "thinking": response  # Store the thinking process for reflection
+            "thinking": response,  # Store the thinking process for reflection
+            "model": model
         }
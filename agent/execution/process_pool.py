@@ -0,0 +1,232 @@
+"""Module for running CPU-bound tools in worker processes with time and memory limits."""
+
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+import os
+
+try:
+    import resource
+except ImportError:  # not available on Windows, where no memory limit is applied
+    resource = None
+
+from agent.core.deadline import current_deadline
+from agent.core.metrics import metrics
+from config.settings import settings
+from tools.registry import load_object
+
+logger = logging.getLogger(__name__)
+
+# Seconds a new worker may take to start up, separate from the per-call timeout
+_STARTUP_TIMEOUT = 60.0
+
+class ToolWorkerError(RuntimeError):
+    """Raised when a tool call in a worker process fails or its worker dies."""
+
+class ToolTimeoutError(ToolWorkerError):
+    """Raised when a tool call in a worker process exceeds its timeout."""
+
+class ToolWorkerStartError(ToolWorkerError):
+    """Raised when a worker process cannot be started, for example because the main
+    script has no ``if __name__ == "__main__"`` guard."""
+
+def tool_path(tool: Any) -> str:
+    """The ``module:qualname`` path workers use to build their own copy of a tool."""
+    cls = type(tool)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+def _address_space() -> int:
+    """Current virtual memory size of this process in bytes, or 0 if unknown."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def _limit_memory(memory_limit_mb: int) -> None:
+    """Cap the address space at the current size plus ``memory_limit_mb``.
+
+    The baseline is added because imported libraries such as NumPy reserve a lot
+    of address space up front, which differs between machines.
+    """
+    if resource is None or not memory_limit_mb:
+        return
+    limit = _address_space() + memory_limit_mb * 2**20
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError) as e:
+        logger.warning("Could not limit worker memory: %s", e)
+
+def _worker_main(conn: Connection, memory_limit_mb: int) -> None:
+    """Serve tool calls sent over ``conn`` until it is closed."""
+    _limit_memory(memory_limit_mb)
+    loop = asyncio.new_event_loop()
+    tools: Dict[str, Any] = {}
+    conn.send(("ready", None))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        path, parameters = request
+        try:
+            if path not in tools:
+                tools[path] = load_object(path)()
+                tools[path].in_worker = True
+            result = loop.run_until_complete(tools[path].execute(parameters))
+            conn.send(("ok", result))
+        except MemoryError:
+            # The worker's state can no longer be trusted; let it be replaced
+            conn.send(("fatal", "Tool exceeded the memory limit"))
+            break
+        # pylint: disable-next=broad-exception-caught
+        except Exception as e:  # reported to the caller, the worker stays usable
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    loop.close()
+
+class _Worker:
+    """A worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, memory_limit_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit_mb),
+            name="tool-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.dead = False
+
+    def wait_ready(self) -> None:
+        if not self.conn.poll(_STARTUP_TIMEOUT):
+            raise ToolWorkerStartError("Tool worker did not start in time")
+        self.conn.recv()
+
+    def call(self, path: str, parameters: Dict[str, Any], timeout: float) -> Tuple[str, Any]:
+        self.conn.send((path, parameters))
+        if not self.conn.poll(timeout):
+            raise ToolTimeoutError(f"Tool call exceeded the timeout of {timeout:g}s")
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        self.dead = True
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class _Call:
+    """Shared between a pending call and the thread running it, for cancellation."""
+
+    def __init__(self):
+        self.worker: Optional[_Worker] = None
+        self.cancelled = False
+
+class ToolProcessPool:
+    """Runs tools declared ``cpu_bound`` in a pool of worker processes.
+
+    Each worker builds its own instance of a tool from the tool's class, so such
+    tools must be constructible without arguments. Workers are spawned, so like any
+    ``multiprocessing`` user the main script needs an ``if __name__ == "__main__"``
+    guard; ``ToolWorkerStartError`` is raised when a worker cannot start. A call
+    that runs longer than
+    ``timeout`` seconds, or whose worker runs out of its ``memory_limit_mb``, gets
+    its worker killed and replaced, and raises ``ToolWorkerError``. Waiting on the
+    workers happens on a small thread pool, so the event loop is never blocked.
+    """
+
+    def __init__(
+            self, max_workers: Optional[int] = None, timeout: Optional[float] = None,
+            memory_limit_mb: Optional[int] = None, start_method: str = "spawn"):
+        self.max_workers = max_workers or settings.tool_process_workers
+        self.timeout = timeout or settings.tool_call_timeout
+        self.memory_limit_mb = (
+            settings.tool_memory_limit_mb if memory_limit_mb is None else memory_limit_mb)
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: List[_Worker] = []
+        # The semaphore limiting concurrent calls and the event loop it belongs to
+        self._slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="tool-pool")
+
+    async def run(self, tool: Any, parameters: Dict[str, Any]) -> Any:
+        """Execute ``tool`` with ``parameters`` in a worker and return its result.
+
+        The call's timeout is shortened to fit the current deadline, if any.
+        """
+        async with self._get_slots():
+            call = _Call()
+            call.worker = self._idle.pop() if self._idle else None
+            deadline = current_deadline()
+            timeout = self.timeout if deadline is None else deadline.timeout(self.timeout)
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(
+                    self._executor, self._call, call, tool_path(tool), parameters, timeout)
+            except asyncio.CancelledError:
+                # The worker is still busy with the call and cannot be reused. Only the
+                # process is killed here; the waiting thread sees it exit and cleans up.
+                call.cancelled = True
+                if call.worker is not None:
+                    call.worker.process.kill()
+                raise
+            finally:
+                if call.worker is not None and not call.worker.dead and not call.cancelled:
+                    self._idle.append(call.worker)
+            return result
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """The semaphore limiting concurrent calls, one per event loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots[0] is not loop:
+            self._slots = (loop, asyncio.Semaphore(self.max_workers))
+        return self._slots[1]
+
+    def _call(
+            self, call: _Call, path: str, parameters: Dict[str, Any], timeout: float) -> Any:
+        """Run one call on a worker thread, replacing the worker if it fails."""
+        if call.worker is None:
+            call.worker = _Worker(self._context, self.memory_limit_mb)
+            metrics.inc("tool_workers_started_total")
+            if call.cancelled:
+                call.worker.kill()
+                raise ToolWorkerError("Tool call was cancelled")
+            try:
+                call.worker.wait_ready()
+            except (ToolWorkerError, EOFError, OSError) as e:
+                call.worker.kill()
+                raise ToolWorkerStartError(
+                    f"Tool worker failed to start: {str(e) or 'it exited during startup'}") from e
+
+        worker = call.worker
+        try:
+            status, value = worker.call(path, parameters, timeout)
+        except ToolTimeoutError:
+            self._replace(worker, "timeout")
+            raise
+        except (EOFError, OSError) as e:
+            self._replace(worker, "cancelled" if call.cancelled else "crashed")
+            raise ToolWorkerError(f"Tool worker died: {str(e) or 'connection closed'}") from e
+
+        if call.cancelled:
+            worker.kill()
+        if status == "fatal":
+            self._replace(worker, "memory")
+            raise ToolWorkerError(value)
+        if status == "error":
+            raise ToolWorkerError(value)
+        return value
+
+    @staticmethod
+    def _replace(worker: _Worker, reason: str) -> None:
+        # A new worker is started by the next call that finds no idle one
+        logger.warning("Killing tool worker %s (%s)", worker.process.pid, reason)
+        worker.kill()
+        metrics.inc("tool_worker_restarts_total", reason=reason)
+
+    def close(self) -> None:
+        """Stop every idle worker and the waiting threads."""
+        while self._idle:
+            self._idle.pop().kill()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,133 @@
+"""Module for routing thinking steps through a fast model with escalation to a strong one."""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import re
+import time
+
+from agent.core.client import AnthropicClient
+from agent.core.metrics import metrics
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+UNCERTAIN_MARKER = "UNCERTAIN"
+
+FAST_MODEL_INSTRUCTION = (
+    f"If you cannot complete this step reliably, reply with only the word {UNCERTAIN_MARKER}."
+)
+
+# A check returns the reason to escalate a fast model's output, or None to accept it
+EscalationCheck = Callable[[Dict[str, Any], Optional[str]], Optional[str]]
+
+def uncertain_check(_step: Dict[str, Any], output: Optional[str]) -> Optional[str]:
+    """Escalate when the fast model says it is not confident."""
+    if output is not None and UNCERTAIN_MARKER in output[:200]:
+        return "uncertain"
+    return None
+
+def min_length_check(min_chars: int) -> EscalationCheck:
+    """Escalate missing or suspiciously short outputs."""
+    def check(_step: Dict[str, Any], output: Optional[str]) -> Optional[str]:
+        if output is None:
+            return "error"
+        if len(output.strip()) < min_chars:
+            return "too_short"
+        return None
+    return check
+
+def format_check(pattern: str, reason: str = "format") -> EscalationCheck:
+    """Escalate outputs that do not match the regular expression ``pattern``."""
+    regex = re.compile(pattern, re.DOTALL)
+
+    def check(_step: Dict[str, Any], output: Optional[str]) -> Optional[str]:
+        if output is not None and not regex.search(output):
+            return reason
+        return None
+    return check
+
+def default_checks() -> List[EscalationCheck]:
+    """The checks used when a router is built without explicit ones."""
+    return [uncertain_check, min_length_check(settings.cascade_min_output_chars)]
+
+
+class ModelRouter:
+    """Sends thinking steps to the fast model first and escalates when a check fails.
+
+    Steps the planner marked with ``"difficulty": "hard"`` go straight to the strong
+    model. Every other step is answered by the fast model, which is told to reply
+    with ``UNCERTAIN`` when it cannot do the step; its answer is then run through
+    ``checks`` and the first check that returns a reason sends the step to the
+    strong model instead.
+    """
+
+    def __init__(
+            self, fast_model: Optional[str] = None, strong_model: Optional[str] = None,
+            checks: Optional[List[EscalationCheck]] = None):
+        self.fast_client = AnthropicClient(model=fast_model or settings.fast_model)
+        self.strong_client = AnthropicClient(model=strong_model or settings.anthropic_model)
+        self.checks = default_checks() if checks is None else checks
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._escalations: Dict[str, int] = {}
+        self._routed = 0
+
+    async def complete(
+            self, step: Dict[str, Any], system_prompt: str, user_message: str,
+            temperature: float) -> Tuple[Optional[str], str]:
+        """Answer a thinking step, returning the output and the model that produced it."""
+        self._routed += 1
+        if str(step.get("difficulty", "")).lower() == "hard":
+            reason = "planned_hard"
+        else:
+            output = await self._call(
+                self.fast_client, f"{system_prompt}\n\n{FAST_MODEL_INSTRUCTION}",
+                user_message, temperature)
+            reason = self._failed_check(step, output)
+            if reason is None:
+                return output, self.fast_client.model
+
+        logger.info(
+            "Escalating step %s to %s (%s)", step.get("step_id"), self.strong_client.model, reason)
+        self._escalations[reason] = self._escalations.get(reason, 0) + 1
+        metrics.inc("router_escalations_total", reason=reason)
+        output = await self._call(self.strong_client, system_prompt, user_message, temperature)
+        return output, self.strong_client.model
+
+    def _failed_check(self, step: Dict[str, Any], output: Optional[str]) -> Optional[str]:
+        for check in self.checks:
+            reason = check(step, output)
+            if reason is not None:
+                return reason
+        return None
+
+    async def _call(
+            self, client: AnthropicClient, system_prompt: str, user_message: str,
+            temperature: float) -> Optional[str]:
+        start = time.perf_counter()
+        output = await client.complete_async(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            temperature=temperature
+        )
+        elapsed = time.perf_counter() - start
+
+        stats = self._stats.setdefault(
+            client.model, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        stats["calls"] += 1
+        stats["total_seconds"] += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+        return output
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-model call counts and latencies, and escalations by reason."""
+        models = {
+            model: dict(stats, mean_seconds=stats["total_seconds"] / stats["calls"])
+            for model, stats in self._stats.items()
+        }
+        escalated = sum(self._escalations.values())
+        return {
+            "models": models,
+            "steps": self._routed,
+            "escalations": dict(self._escalations),
+            "escalation_rate": escalated / self._routed if self._routed else 0.0,
+        }
@@ -0,0 +1,74 @@
+"""Module for running plan steps as a dependency graph on the asyncio event loop."""
+
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, Optional, Union
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+StepRunner = Callable[[Dict[str, Any], Dict[int, Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+class PlanScheduler:
+    """Executes plan steps as soon as the steps they depend on have finished.
+
+    Each step is started once every id in its ``depends_on`` list has produced a
+    result, and at most ``max_concurrency`` steps run at the same time. The step
+    runner receives only the results of the step's own dependencies. The plan may be
+    an async iterable that is still being generated; steps are scheduled as they
+    arrive and may only depend on steps that arrived before them.
+    """
+
+    def __init__(self, run_step: StepRunner, max_concurrency: int = 4):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.run_step = run_step
+        self.max_concurrency = max_concurrency
+
+    async def run(
+            self, plan: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+            completed: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[int, Dict[str, Any]]:
+        """Run every step in the plan and return the results keyed by step id.
+
+        Steps with a result in ``completed`` are not run again; their results are
+        passed on to the steps that depend on them.
+        """
+        results: Dict[int, Dict[str, Any]] = dict(completed or {})
+        finished: Dict[int, asyncio.Event] = {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = []
+
+        async def _run(step: Dict[str, Any]) -> None:
+            step_id = step["step_id"]
+            dependencies = [dep for dep in step.get("depends_on", []) if dep in finished]
+            for dep in dependencies:
+                await finished[dep].wait()
+
+            async with semaphore:
+                logger.debug("Starting step %s (depends on %s)", step_id, dependencies)
+                dependency_results = {dep: results[dep] for dep in dependencies}
+                results[step_id] = await self.run_step(step, dependency_results)
+            finished[step_id].set()
+
+        def _schedule(step: Dict[str, Any]) -> None:
+            step_id = step["step_id"]
+            finished[step_id] = asyncio.Event()
+            if step_id in results:
+                finished[step_id].set()
+            else:
+                tasks.append(asyncio.ensure_future(_run(step)))
+
+        try:
+            if isinstance(plan, AsyncIterable):
+                async for step in plan:
+                    _schedule(step)
+            else:
+                for step in plan:
+                    _schedule(step)
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return results
@@ -0,0 +1,166 @@
+"""Module for caching generated plans so repeated tasks skip the planning call."""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def normalize_task(task_description: str) -> str:
+    """Collapse whitespace so formatting differences do not change the cache key."""
+    return " ".join(task_description.split())
+
+def tools_fingerprint(tools_registry: Dict[str, Any]) -> str:
+    """Hash the name, description, schema and example of every registered tool."""
+    tools = []
+    for name in sorted(tools_registry):
+        tool = tools_registry[name]
+        tools.append([
+            name,
+            tool.description,
+            tool.get_parameters_schema(),
+            tool.get_example(),
+        ])
+    payload = json.dumps(tools, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def make_plan_key(
+        task_description: str, context: str, model: str, temperature: float,
+        fingerprint: str) -> str:
+    """Build the cache key for a planning request."""
+    payload = json.dumps([
+        normalize_task(task_description),
+        normalize_task(context),
+        model,
+        temperature,
+        fingerprint,
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLitePlanCacheBackend:
+    """On-disk plan store that keeps cached plans across restarts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "key TEXT PRIMARY KEY, plan TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """Return the stored plan and its creation time, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT plan, created_at FROM plans WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, plan: List[Dict[str, Any]], created_at: float) -> None:
+        """Store a plan under ``key``."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (key, plan, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(plan), created_at),
+            )
+
+    def delete(self, key: str) -> None:
+        """Remove a plan from the store."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM plans WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every stored plan."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM plans")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class PlanCache:
+    """LRU cache of plans with a time-to-live and an optional persistent backend.
+
+    Lookups check the in-memory LRU first and fall back to the backend, promoting
+    backend hits into memory. Expired entries are treated as misses and removed.
+    """
+
+    def __init__(
+            self, max_size: int = 1024, ttl: Optional[float] = 3600.0,
+            backend: Optional[SQLitePlanCacheBackend] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[List[Dict[str, Any]], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the cached plan for ``key``, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry[1]):
+            del self._entries[key]
+            entry = None
+
+        if entry is None and self.backend is not None:
+            entry = self.backend.get(key)
+            if entry is not None and self._expired(entry[1]):
+                self.backend.delete(key)
+                entry = None
+            elif entry is not None:
+                self.backend_hits += 1
+                self._store(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(entry[0])
+
+    def set(self, key: str, plan: List[Dict[str, Any]]) -> None:
+        """Cache a copy of ``plan`` under ``key``."""
+        entry = (copy.deepcopy(plan), time.time())
+        self._store(key, entry)
+        if self.backend is not None:
+            self.backend.set(key, entry[0], entry[1])
+
+    def _store(self, key: str, entry: Tuple[List[Dict[str, Any]], float]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached plan, including those in the backend."""
+        self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "backend_hits": self.backend_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
@@ -0,0 +1,142 @@
+"""Module for answering tasks that a single tool can handle without planning."""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from agent.core.metrics import HitCounts, metrics
+from tools.base import FastPathRule
+from tools.schema import validate_parameters
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCTUATION = ".?! "
+
+def _field_value(text: Optional[str]) -> Any:
+    """Turn a matched group into a number when it looks like one."""
+    if text is None:
+        return None
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return text
+
+class FastPathPlan:
+    """A one-step plan produced by a fast-path rule, with its templated summary."""
+
+    def __init__(
+            self, tool_name: str, rule: FastPathRule, parameters: Dict[str, Any],
+            fields: Dict[str, Any], on_summary: Optional[Callable[[bool], None]] = None):
+        self.tool_name = tool_name
+        self.rule = rule
+        self.parameters = parameters
+        self.fields = fields
+        self._on_summary = on_summary
+        self.plan = [{
+            "step_id": 1,
+            "description": f"Answer directly with the {tool_name} tool",
+            "requires_tool": True,
+            "tool_name": tool_name,
+            "tool_parameters": parameters,
+            "depends_on": [],
+        }]
+
+    def summarize(self, results: List[Dict[str, Any]]) -> Optional[str]:
+        """Fill the rule's summary template from the step result.
+
+        Returns None when the rule has no template, the step did not succeed, or
+        the tool output does not fit the template (for example an ``error``), so the
+        caller falls back to a model summary.
+        """
+        summary = None
+        result = results[0]["result"]
+        output = result.get("output") if result.get("status") == "success" else None
+        if isinstance(output, dict):
+            output = None if "error" in output else output.get("result")
+        if self.rule.summary_template is not None and output is not None:
+            try:
+                summary = self.rule.summary_template.format(**self.fields, result=output)
+            except (KeyError, ValueError, TypeError, IndexError) as e:
+                logger.debug("Fast-path summary template did not apply: %s", e)
+        if self._on_summary is not None:
+            self._on_summary(summary is not None)
+        return summary
+
+class FastPathRouter:
+    """Routes tasks that one tool can answer straight to that tool.
+
+    Each tool contributes ``FastPathRule`` patterns through ``get_fast_path_rules``.
+    A task takes the fast path when a rule matches the whole task and the
+    parameters it builds pass the tool's ``get_parameters_schema``; anything else
+    goes to the planner as usual.
+    """
+
+    def __init__(self, tools_registry: Dict[str, Any]):
+        self.tools_registry = tools_registry
+        self._rules: Optional[List[Tuple[str, FastPathRule]]] = None
+        self.counts = HitCounts()
+        self.rejected = 0
+        self.template_summaries = 0
+        self.model_summaries = 0
+        self.rule_hits: Dict[str, int] = {}
+
+    def invalidate_tools(self) -> None:
+        """Collect the rules again after the tools registry changes."""
+        self._rules = None
+
+    def _get_rules(self) -> List[Tuple[str, FastPathRule]]:
+        if self._rules is None:
+            self._rules = [
+                (name, rule)
+                for name, tool in self.tools_registry.items()
+                for rule in tool.get_fast_path_rules()
+            ]
+        return self._rules
+
+    def route(self, task_description: str) -> Optional[FastPathPlan]:
+        """Return a one-step plan for the task, or None if it needs the planner"""
+        text = " ".join(task_description.split()).rstrip(_TRAILING_PUNCTUATION)
+        for tool_name, rule in self._get_rules():
+            match = rule.pattern.fullmatch(text)
+            if match is None:
+                continue
+            parameters = rule.build_parameters(match)
+            if parameters is None:
+                continue
+            errors = validate_parameters(
+                self.tools_registry[tool_name].get_parameters_schema(), parameters)
+            if errors:
+                logger.warning(
+                    "Fast-path rule %s built invalid parameters: %s", rule.name, errors)
+                self.rejected += 1
+                continue
+
+            self.counts.hits += 1
+            key = f"{tool_name}.{rule.name}"
+            self.rule_hits[key] = self.rule_hits.get(key, 0) + 1
+            metrics.inc("fast_path_total", outcome="hit", rule=key)
+            logger.info("Fast path %s matched task (%s)", key, self.stats())
+            fields = {name: _field_value(value) for name, value in match.groupdict().items()}
+            return FastPathPlan(
+                tool_name, rule, parameters, fields, on_summary=self._record_summary)
+
+        self.counts.misses += 1
+        metrics.inc("fast_path_total", outcome="miss")
+        return None
+
+    def _record_summary(self, templated: bool) -> None:
+        if templated:
+            self.template_summaries += 1
+        else:
+            self.model_summaries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the router."""
+        return {
+            "hits": self.counts.hits,
+            "misses": self.counts.misses,
+            "rejected": self.rejected,
+            "hit_rate": self.counts.hit_rate,
+            "template_summaries": self.template_summaries,
+            "model_summaries": self.model_summaries,
+            "rules": dict(self.rule_hits),
+        }
@@ -1,21 +1,83 @@
 """Module for task planning and step generation using LLM-based planning."""
 
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional
+import copy
 import json
 import logging
 
 from agent.core.client import AnthropicClient
+from agent.core.metrics import metrics
+from agent.core.prompt import PromptBuilder, normalize_whitespace
+from agent.planning.cache import (
+    PlanCache, SQLitePlanCacheBackend, make_plan_key, normalize_task, tools_fingerprint)
+from agent.planning.stream_parser import JSONArrayStreamParser
 from config.settings import settings
+from tools.schema import validate_parameters
+
+if TYPE_CHECKING:
+    from agent.planning.similarity import SimilarPlanCache
 
 logger = logging.getLogger(__name__)
 
+# Marks a similar-plan cache that is enabled but not built yet
+_NOT_BUILT = object()
+
+# Name of the tool the planning model calls to submit its plan
+PLAN_TOOL_NAME = "submit_plan"
+
 class TaskPlanner:
     """A planner that breaks down tasks into executable steps using LLM-based planning."""
 
-    def __init__(self, tools_registry: Dict[str, Any] = None):
+    def __init__(
+            self, tools_registry: Dict[str, Any] = None,
+            plan_cache: Optional[PlanCache] = None,
+            similar_plan_cache: Optional["SimilarPlanCache"] = None):
         logger.debug("Initializing TaskPlanner")
         self.client = AnthropicClient(model=settings.planning_model)
-        self.tools_registry = tools_registry or {}
+        self.tools_registry = tools_registry if tools_registry is not None else {}
+        self.plan_cache = plan_cache
+        if self.plan_cache is None and settings.plan_cache_enabled:
+            backend = None
+            if settings.plan_cache_path:
+                backend = SQLitePlanCacheBackend(settings.plan_cache_path)
+            self.plan_cache = PlanCache(
+                max_size=settings.plan_cache_size,
+                ttl=settings.plan_cache_ttl,
+                backend=backend,
+            )
+        self._similar_plan_cache: Any = similar_plan_cache
+        if similar_plan_cache is None and settings.similar_plan_cache_enabled:
+            self._similar_plan_cache = _NOT_BUILT
+        self.structured_output = settings.structured_planning_enabled
+        # Fingerprint, system prompt and plan tool, all derived from the tools registry
+        self._derived: Dict[str, Any] = {}
+
+    @property
+    def similar_plan_cache(self) -> Optional["SimilarPlanCache"]:
+        """The similar-plan cache, built on first use since it needs NumPy."""
+        if self._similar_plan_cache is _NOT_BUILT:
+            # pylint: disable=import-outside-toplevel
+            from agent.planning.similarity import SimilarPlanCache
+
+            self._similar_plan_cache = SimilarPlanCache(
+                threshold=settings.similar_plan_threshold,
+                max_entries=settings.similar_plan_cache_size,
+            )
+        return self._similar_plan_cache
+
+    @similar_plan_cache.setter
+    def similar_plan_cache(self, cache: Optional["SimilarPlanCache"]) -> None:
+        self._similar_plan_cache = cache
+
+    def invalidate_tools(self) -> None:
+        """Forget everything derived from the tools registry after it changes."""
+        self._derived.clear()
+
+    def _get_tools_fingerprint(self) -> str:
+        """Fingerprint of the registered tools, part of every plan cache key."""
+        if "fingerprint" not in self._derived:
+            self._derived["fingerprint"] = tools_fingerprint(self.tools_registry)
+        return self._derived["fingerprint"]
 
     def _get_tools_description(self) -> str:
         """Generate description of available tools for the system prompt."""
@@ -24,79 +86,305 @@ class TaskPlanner:
 
         tools_desc = ["Available tools:"]
         for name, tool in self.tools_registry.items():
-            tools_desc.append(f"- {name}: {tool.description}")
+            # Descriptions written as indented multi-line strings go in as one line
+            tools_desc.append(f"- {name}: {' '.join(tool.description.split())}")
             example = tool.get_example()
             if example:
                 tools_desc.append(f"  Example: {example}")
 
         return "\n".join(tools_desc)
 
+    def _get_system_prompt(self) -> str:
+        """The planner's system prompt, built once per tools registry.
+
+        It only depends on the registered tools, so it is identical on every call and
+        is sent as a prompt-cache breakpoint.
+        """
+        if "system_prompt" not in self._derived:
+            self._derived["system_prompt"] = self._build_system_prompt()
+        return self._derived["system_prompt"]
+
+    def _build_system_prompt(self) -> str:
+        """Assemble the system prompt around the current tools description."""
+        if self.structured_output:
+            response_format = (
+                f"Submit your plan by calling the {PLAN_TOOL_NAME} tool with a list of steps, "
+                "where each step has:")
+        else:
+            response_format = "Format your response as a JSON array of steps, where each step has:"
+        # The tools description is joined in after dedenting, since its lines are
+        # not indented like the rest of the template
+        return "\n\n".join([
+            normalize_whitespace("""
+            You are an AI task planner. Your job is to break down tasks into clear, executable steps.
+            Each step should be specific and actionable.
+            """),
+            self._get_tools_description(),
+            response_format + "\n" + normalize_whitespace("""
+            - "step_id": a numeric identifier
+            - "description": what needs to be done
+            - "requires_tool": boolean indicating if this step needs an external tool
+            - "tool_name": the name of the tool if requires_tool is true, otherwise null
+            - "tool_parameters": expected parameters for the tool if requires_tool is true, otherwise null
+            - "depends_on": list of step_ids whose results this step needs; use [] when the step
+              is independent so it can run in parallel with other steps
+            - "difficulty": "hard" for thinking steps that need careful multi-step reasoning,
+              otherwise "easy"
+
+            Make sure the steps are in the correct order and cover all aspects of the task.
+            A step may only depend on steps that come before it.
+            For tool-based steps, use the exact parameter format shown in the examples.
+            """),
+        ])
+
+    def _get_plan_tool(self) -> Dict[str, Any]:
+        """The tool the planning model submits its plan with, built once per registry."""
+        if "plan_tool" not in self._derived:
+            self._derived["plan_tool"] = self._build_plan_tool()
+        return self._derived["plan_tool"]
+
+    def _build_plan_tool(self) -> Dict[str, Any]:
+        """Describe the plan as the input of a tool, with a form per registered tool.
+
+        Each tool step form carries that tool's parameters schema, so the model is
+        held to valid parameters while it writes the plan.
+        """
+        step_forms = [{
+            "properties": {
+                "requires_tool": {"enum": [False]},
+                "tool_name": {"type": "null"},
+                "tool_parameters": {"type": "null"},
+            },
+        }]
+        for name, tool in self.tools_registry.items():
+            step_forms.append({
+                "properties": {
+                    "requires_tool": {"enum": [True]},
+                    "tool_name": {"enum": [name]},
+                    "tool_parameters": tool.get_parameters_schema(),
+                },
+            })
+        step_schema = {
+            "type": "object",
+            "properties": {
+                "step_id": {"type": "integer"},
+                "description": {"type": "string"},
+                "requires_tool": {"type": "boolean"},
+                "tool_name": {"type": ["string", "null"]},
+                "tool_parameters": {"type": ["object", "null"]},
+                "depends_on": {"type": "array", "items": {"type": "integer"}},
+                "difficulty": {"enum": ["easy", "hard"]},
+            },
+            "required": [
+                "step_id", "description", "requires_tool", "tool_name", "tool_parameters",
+                "depends_on"],
+            "anyOf": step_forms,
+        }
+        return {
+            "name": PLAN_TOOL_NAME,
+            "description": "Submit the step-by-step plan for the task, in execution order.",
+            "input_schema": {
+                "type": "object",
+                "properties": {"steps": {"type": "array", "items": step_schema}},
+                "required": ["steps"],
+            },
+        }
+
     async def create_plan(self, task_description: str, context: str = "") -> List[Dict[str, Any]]:
         """Create a step-by-step plan for completing the task"""
+        return [step async for step in self.stream_plan(task_description, context)]
+
+    async def stream_plan(
+            self, task_description: str, context: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """Yield the steps of the plan for the task as soon as each one is known.
+
+        The planning model's response is streamed and parsed incrementally, so early
+        steps can start executing while later ones are still being generated. If the
+        response cannot be used before any step was yielded, a single-step fallback
+        plan is yielded instead; if it breaks off later, the plan ends at the last
+        valid step. Only complete plans are cached.
+        """
         logger.info("Creating plan for task: %s", task_description)
         if context:
             logger.debug("Additional context: %s", context)
 
-        system_prompt = f"""
-        You are an AI task planner. Your job is to break down tasks into clear, executable steps.
-        Each step should be specific and actionable.
-
-        {self._get_tools_description()}
+        cache_key = None
+        if self.plan_cache is not None:
+            cache_key = make_plan_key(
+                task_description, context, self.client.model,
+                settings.planning_temperature, self._get_tools_fingerprint())
+            cached_plan = self.plan_cache.get(cache_key)
+            if cached_plan is not None:
+                logger.info("Using cached plan (%s)", self.plan_cache.stats())
+                for step in cached_plan:
+                    yield step
+                return
 
-        Format your response as a JSON array of steps, where each step has:
-        - "step_id": a numeric identifier
-        - "description": what needs to be done
-        - "requires_tool": boolean indicating if this step needs an external tool
-        - "tool_name": the name of the tool if requires_tool is true, otherwise null
-        - "tool_parameters": expected parameters for the tool if requires_tool is true, otherwise null
+        namespace = "|".join([
+            self.client.model, str(settings.planning_temperature),
+            self._get_tools_fingerprint(), normalize_task(context)])
+        if self.similar_plan_cache is not None:
+            similar_plan = self.similar_plan_cache.lookup(task_description, namespace)
+            if similar_plan is not None:
+                logger.info(
+                    "Reusing plan of a similar task (%s)", self.similar_plan_cache.stats())
+                if cache_key is not None:
+                    self.plan_cache.set(cache_key, similar_plan)
+                for step in similar_plan:
+                    yield step
+                return
 
-        Make sure the steps are in the correct order and cover all aspects of the task.
-        For tool-based steps, use the exact parameter format shown in the examples.
-        """
+        plan = []
+        try:
+            async for step in self._generate_plan(task_description, context):
+                plan.append(step)
+                yield copy.deepcopy(step)
+        except (ValueError, SyntaxError, TypeError) as e:
+            logger.error("Error creating plan: %s", e, exc_info=True)
+            if plan:
+                logger.warning("Plan ended early after %d steps", len(plan))
+                metrics.inc("plan_failures_total", outcome="truncated")
+                return
+            logger.info("Falling back to simple plan")
+            metrics.inc("plan_failures_total", outcome="fallback")
+            # Fallback to a simple plan, which is never cached
+            yield {
+                "step_id": 1,
+                "description": f"Complete the task: {task_description}",
+                "requires_tool": False,
+                "tool_name": None,
+                "tool_parameters": None,
+                "depends_on": []
+            }
+            return
 
-        user_message = f"""
-        Task to plan: {task_description}
+        logger.info("Generated plan: %s", json.dumps(plan, indent=2))
+        if cache_key is not None:
+            self.plan_cache.set(cache_key, plan)
+        if self.similar_plan_cache is not None:
+            self.similar_plan_cache.add(task_description, plan, namespace)
 
-        Additional context: {context}
+    async def _generate_plan(
+            self, task_description: str, context: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a plan from the planning model, validating each step as it arrives"""
 
-        Create a step-by-step plan to complete this task. Return ONLY the JSON array without explanation.
-        """
+        builder = PromptBuilder(max_tokens=settings.max_input_tokens)
+        builder.system(self._get_system_prompt())
+        builder.add(f"Task to plan: {task_description}")
+        if context:
+            # Context is the first thing given up when the request is too large
+            builder.add(context, title="Additional context", shrink_order=0)
+        if self.structured_output:
+            builder.add(
+                "Create a step-by-step plan to complete this task "
+                f"and submit it with the {PLAN_TOOL_NAME} tool.")
+        else:
+            builder.add(
+                "Create a step-by-step plan to complete this task. "
+                "Return ONLY the JSON array without explanation.")
+        system_prompt, user_message = builder.build()
 
-        try:
-            logger.debug("Sending request to LLM for plan generation")
-            response = await self.client.complete_async(
+        logger.debug("Streaming plan from LLM")
+        if self.structured_output:
+            # The tool input is an object holding the steps array, which the parser
+            # finds just like an array written as text
+            stream = self.client.stream_tool_input_async(
+                system_prompt=system_prompt,
+                user_message=user_message,
+                tool=self._get_plan_tool(),
+                temperature=settings.planning_temperature,
+                max_tokens=settings.max_tokens_response
+            )
+        else:
+            stream = self.client.stream_async(
                 system_prompt=system_prompt,
                 user_message=user_message,
                 temperature=settings.planning_temperature,
                 max_tokens=settings.max_tokens_response
             )
-            logger.debug("Received response from LLM")
+        parser = JSONArrayStreamParser()
+        seen_ids: List[Any] = []
+        async for text in stream:
+            for step in parser.feed(text):
+                self._validate_step(step)
+                if step["step_id"] in seen_ids:
+                    raise ValueError(f"Duplicate step id {step['step_id']!r} in plan")
+                self._check_tool_step(step)
+                yield self._normalize_step(step, seen_ids)
 
-            # Parse the response as JSON
-            plan = json.loads(response)
-            logger.info("Generated plan: %s", json.dumps(plan, indent=2))
+        if not parser.finished:
+            raise ValueError("Plan response ended before the JSON array was closed")
+        if not seen_ids:
+            raise ValueError("Plan response contained no steps")
+        logger.debug("Received complete plan from LLM")
 
-            # Validate plan structure
-            for step in plan:
-                assert "step_id" in step
-                assert "description" in step
-                assert "requires_tool" in step
-                assert "tool_name" in step
-                assert "tool_parameters" in step
-                logger.debug("Validated step %d: %s", step['step_id'], step['description'])
+    @staticmethod
+    def _validate_step(step: Any) -> None:
+        """Check that a parsed step has every required field.
 
-            return plan
+        Thinking steps may leave out the tool fields, which default to null.
+        """
+        if not isinstance(step, dict):
+            raise ValueError(f"Plan step is not an object: {step!r}")
+        if not step.get("requires_tool"):
+            step.setdefault("tool_name", None)
+            step.setdefault("tool_parameters", None)
+        for field in ("step_id", "description", "requires_tool", "tool_name", "tool_parameters"):
+            if field not in step:
+                raise ValueError(f"Plan step is missing {field!r}: {step!r}")
+        logger.debug("Validated step %s: %s", step["step_id"], step["description"])
 
-        except (ValueError, SyntaxError, TypeError) as e:
-            logger.error("Error creating plan: %s", e, exc_info=True)
-            logger.info("Falling back to simple plan")
-            # Fallback to a simple plan
-            return [
-                {
-                    "step_id": 1,
-                    "description": f"Complete the task: {task_description}",
-                    "requires_tool": False,
-                    "tool_name": None,
-                    "tool_parameters": None
-                }
-            ]
+    def _check_tool_step(self, step: Dict[str, Any]) -> None:
+        """Check a tool step's parameters against the tool's schema.
+
+        Parameters given as a JSON string are decoded first. A step naming an unknown
+        tool or with parameters the tool would reject is run as a thinking step
+        instead, so the plan is kept without asking the model again.
+        """
+        if not step["requires_tool"]:
+            return
+        tool_name, parameters = step["tool_name"], step["tool_parameters"]
+        if isinstance(parameters, str):
+            try:
+                parameters = step["tool_parameters"] = json.loads(parameters)
+            except ValueError:
+                pass
+        if tool_name not in self.tools_registry:
+            problems = [f"unknown tool {tool_name!r}"]
+            reason = "unknown_tool"
+        else:
+            problems = validate_parameters(
+                self.tools_registry[tool_name].get_parameters_schema(), parameters)
+            reason = "invalid_parameters"
+        if not problems:
+            return
+        logger.warning(
+            "Running step %s as a thinking step: %s", step["step_id"], "; ".join(problems))
+        metrics.inc("plan_step_repairs_total", reason=reason)
+        step.update(requires_tool=False, tool_name=None, tool_parameters=None)
+
+    @staticmethod
+    def _normalize_step(step: Dict[str, Any], seen_ids: List[Any]) -> Dict[str, Any]:
+        """Ensure a step has a ``depends_on`` list that only references earlier steps.
+
+        ``seen_ids`` holds the ids of the steps before it and is extended with this
+        step's id. A step without a ``depends_on`` entry depends on the previous step,
+        which keeps the original sequential behaviour. References to unknown or later
+        steps are dropped so the plan is always an acyclic graph.
+        """
+        depends_on = step.get("depends_on")
+        if depends_on is None:
+            depends_on = seen_ids[-1:]
+        elif not isinstance(depends_on, list):
+            depends_on = [depends_on]
+
+        valid = []
+        for dep in depends_on:
+            if dep in seen_ids and dep not in valid:
+                valid.append(dep)
+            else:
+                logger.warning("Dropping invalid dependency %s of step %s", dep, step["step_id"])
+
+        step["depends_on"] = valid
+        seen_ids.append(step["step_id"])
+        return step
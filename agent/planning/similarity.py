@@ -0,0 +1,342 @@
+"""Module for reusing plans of near-duplicate tasks via hashed n-gram similarity."""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+import copy
+import logging
+import re
+import zlib
+
+import numpy as np
+
+from agent.core.metrics import HitCounts
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_RE = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?!\w)")
+_SLOT_RE = re.compile(r"\"([^\"]+)\"|(?<![\w.])(\d[\d,]*(?:\.\d+)?)(%?)|\b([A-Z][\w&'-]*)")
+_SENTENCE_END_RE = re.compile(r"[.!?:]\s*$")
+_WORD_RE = re.compile(r"<\w+>|\w+")
+
+# Values that usually appear in plans as constants rather than task inputs
+_CONSTANTS = (0.0, 1.0)
+
+def _parse_number(text: str) -> float:
+    return _key(float(text.replace(",", "")))
+
+def _key(value: float) -> float:
+    """Round away float noise such as 4.6 / 100 == 0.045999999999999996."""
+    return round(value, 10)
+
+def _format_number(value: float) -> str:
+    """Format a number the way it would appear in a tool expression."""
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+def extract_template(task_description: str) -> Tuple[str, List[Tuple[str, Any]]]:
+    """Split a task into a template and its variable slots.
+
+    Numbers (with an optional percent sign), quoted strings and capitalized names
+    that do not start a sentence become slots. The template replaces them with
+    ``<num>``, ``<pct>`` and ``<ent>`` placeholders, so tasks that only differ in
+    those values share a template.
+    """
+    text = " ".join(task_description.split())
+    slots: List[Tuple[str, Any]] = []
+    parts = []
+    last = 0
+    for match in _SLOT_RE.finditer(text):
+        quoted, number, percent, name = match.groups()
+        if name is not None:
+            prefix = text[:match.start()]
+            if not prefix.strip() or _SENTENCE_END_RE.search(prefix):
+                continue
+            slots.append(("ent", name))
+            placeholder = "<ent>"
+        elif quoted is not None:
+            slots.append(("ent", quoted))
+            placeholder = "<ent>"
+        else:
+            kind = "pct" if percent else "num"
+            slots.append((kind, _parse_number(number)))
+            placeholder = f"<{kind}>"
+        parts.append(text[last:match.start()])
+        parts.append(placeholder)
+        last = match.end()
+    parts.append(text[last:])
+    return "".join(parts).lower(), slots
+
+
+class PlanTemplateFiller:
+    """Re-fills a cached plan with the slot values of a new task."""
+
+    def __init__(self, old_slots: List[Tuple[str, Any]], new_slots: List[Tuple[str, Any]]):
+        self.numbers: Dict[float, float] = {}
+        self.entities: Dict[str, str] = {}
+        self.used: Set[Any] = set()
+        self.valid = self._build(old_slots, new_slots)
+
+    def _map_number(self, old: float, new: float) -> bool:
+        old, new = _key(old), _key(new)
+        if old in _CONSTANTS and new != old:
+            # Cannot tell the task input apart from a constant in the plan
+            return False
+        if self.numbers.get(old, new) != new:
+            return False
+        self.numbers[old] = new
+        return True
+
+    def _build(self, old_slots, new_slots) -> bool:
+        if [kind for kind, _ in old_slots] != [kind for kind, _ in new_slots]:
+            return False
+        for (kind, old), (_, new) in zip(old_slots, new_slots):
+            if kind == "ent":
+                if self.entities.get(old, new) != new:
+                    return False
+                self.entities[old] = new
+            elif not self._map_number(old, new):
+                return False
+            elif kind == "pct" and not self._map_number(old / 100, new / 100):
+                return False
+        return True
+
+    def _fill_text(self, text: str) -> str:
+        def replace_number(match):
+            value = _parse_number(match.group(0))
+            if value in self.numbers:
+                self.used.add(value)
+                return _format_number(self.numbers[value])
+            return match.group(0)
+
+        text = _NUMBER_RE.sub(replace_number, text)
+        for old, new in self.entities.items():
+            pattern = re.compile(rf"\b{re.escape(old)}\b")
+            if pattern.search(text):
+                self.used.add(old)
+                text = pattern.sub(new, text)
+        return text
+
+    def _fill(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._fill_text(value)
+        if isinstance(value, list):
+            return [self._fill(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._fill(item) for key, item in value.items()}
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if _key(value) in self.numbers:
+                self.used.add(_key(value))
+                return self.numbers[_key(value)]
+        return value
+
+    def fill(self, plan: List[Dict[str, Any]], old_slots) -> Optional[List[Dict[str, Any]]]:
+        """Return the re-filled plan, or None when it cannot be safely reused.
+
+        Reuse is refused when a slot value of the original task does not appear
+        anywhere in the plan, since the plan then contains a value derived from it.
+        """
+        if not self.valid:
+            return None
+        filled = []
+        for step in plan:
+            step = copy.deepcopy(step)
+            step["description"] = self._fill(step.get("description", ""))
+            step["tool_parameters"] = self._fill(step.get("tool_parameters"))
+            filled.append(step)
+
+        for kind, value in old_slots:
+            if value in self.used:
+                continue
+            if kind == "pct" and _key(value / 100) in self.used:
+                continue
+            return None
+        return filled
+
+
+class _Entry:
+    """A stored plan together with the template it was built for."""
+
+    __slots__ = ("namespace", "template", "slots", "plan", "signatures")
+
+    def __init__(self, namespace, template, slots, plan, signatures):
+        self.namespace = namespace
+        self.template = template
+        self.slots = slots
+        self.plan = plan
+        self.signatures = signatures
+
+
+@dataclass(frozen=True)
+class LSHParams:
+    """Size of the hashed embedding and shape of the random hyperplane LSH tables."""
+
+    dim: int = 128
+    num_tables: int = 4
+    num_bits: int = 16
+    seed: int = 0
+
+
+class _VectorIndex:
+    """Embedded templates in a contiguous float32 matrix, with LSH tables over its rows.
+
+    Rows are handed out in order and wrap around once ``max_rows`` is reached, so
+    the oldest rows are reused first.
+    """
+
+    def __init__(self, max_rows: int, params: LSHParams):
+        self.max_rows = max_rows
+        self.params = params
+        rng = np.random.default_rng(params.seed)
+        self._planes = rng.standard_normal(
+            (params.num_tables * params.num_bits, params.dim)).astype(np.float32)
+        self._bit_weights = 1 << np.arange(params.num_bits, dtype=np.int64)
+        self._buckets: List[Dict[Tuple[str, int], Set[int]]] = [
+            {} for _ in range(params.num_tables)]
+        self.vectors = np.zeros((min(1024, max_rows), params.dim), dtype=np.float32)
+        self._next_row = 0
+
+    def embed(self, template: str) -> np.ndarray:
+        """Embed a template as signed, hashed word and character n-grams."""
+        vector = np.zeros(self.params.dim, dtype=np.float32)
+        words = _WORD_RE.findall(template)
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        features += [template[i:i + 3] for i in range(len(template) - 2)]
+        for feature in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vector[digest % self.params.dim] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def signatures(self, vector: np.ndarray, namespace: str) -> List[Tuple[str, int]]:
+        """The bucket of ``vector`` in each LSH table."""
+        bits = (self._planes @ vector > 0).reshape(self.params.num_tables, self.params.num_bits)
+        return [(namespace, int(sig)) for sig in bits.astype(np.int64) @ self._bit_weights]
+
+    def candidates(self, vector: np.ndarray, namespace: str) -> np.ndarray:
+        """Rows that share an LSH bucket with ``vector`` in at least one table."""
+        candidates: Set[int] = set()
+        for table, signature in zip(self._buckets, self.signatures(vector, namespace)):
+            candidates.update(table.get(signature, ()))
+        return np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+
+    def next_row(self) -> int:
+        """Hand out the next row, wrapping around to the oldest one when full."""
+        row = self._next_row
+        self._next_row = (self._next_row + 1) % self.max_rows
+        return row
+
+    def put(self, row: int, vector: np.ndarray, signatures: List[Tuple[str, int]]) -> None:
+        """Store ``vector`` in ``row`` and add the row to its buckets."""
+        if row >= len(self.vectors):
+            grown = np.zeros(
+                (min(len(self.vectors) * 2, self.max_rows), self.params.dim), dtype=np.float32)
+            grown[:len(self.vectors)] = self.vectors
+            self.vectors = grown
+        self.vectors[row] = vector
+
+        for table, signature in zip(self._buckets, signatures):
+            table.setdefault(signature, set()).add(row)
+
+    def discard(self, row: int, signatures: List[Tuple[str, int]]) -> None:
+        """Remove ``row`` from its buckets."""
+        for table, signature in zip(self._buckets, signatures):
+            bucket = table.get(signature)
+            if bucket is not None:
+                bucket.discard(row)
+                if not bucket:
+                    del table[signature]
+
+
+class SimilarPlanCache:
+    """Index of past plans that can be reused as templates for similar tasks.
+
+    Tasks are embedded as signed, hashed word and character n-grams of their
+    template. Vectors live in a contiguous float32 matrix, and random hyperplane
+    LSH tables narrow each lookup to a handful of candidate rows, which keeps
+    lookups fast with hundreds of thousands of stored plans. Only plans whose
+    template has the same words outside the slots are reused. When the index is
+    full the oldest entries are overwritten.
+    """
+
+    def __init__(
+            self, threshold: float = 0.95, max_entries: int = 100_000, *,
+            lsh: Optional[LSHParams] = None, max_attempts: int = 3):
+        self.threshold = threshold
+        self.max_attempts = max_attempts
+        self._index = _VectorIndex(max_entries, lsh or LSHParams())
+        self._entries: List[_Entry] = []
+        self._rows_by_template: Dict[Tuple[str, str], int] = {}
+        self.counts = HitCounts()
+
+    def lookup(self, task_description: str, namespace: str = "") -> Optional[List[Dict[str, Any]]]:
+        """Return a re-filled plan of a similar past task, or None.
+
+        The similarity score only narrows down the candidates: a plan is reused only
+        when every word of its template outside the slots matches the new task, so
+        tasks such as "simple interest" and "compound interest" never share a plan.
+        """
+        template, slots = extract_template(task_description)
+        words = _WORD_RE.findall(template)
+        vector = self._index.embed(template)
+
+        rows = self._index.candidates(vector, namespace)
+        if len(rows):
+            scores = self._index.vectors[rows] @ vector
+            best = np.argsort(-scores)[:self.max_attempts]
+            for index in best:
+                if scores[index] < self.threshold:
+                    break
+                entry = self._entries[rows[index]]
+                if _WORD_RE.findall(entry.template) != words:
+                    continue
+                filled = PlanTemplateFiller(entry.slots, slots).fill(entry.plan, entry.slots)
+                if filled is not None:
+                    self.counts.hits += 1
+                    logger.debug("Reusing plan with similarity %.3f", scores[index])
+                    return filled
+
+        self.counts.misses += 1
+        return None
+
+    def add(self, task_description: str, plan: List[Dict[str, Any]], namespace: str = "") -> None:
+        """Store the plan of a task so similar tasks can reuse it.
+
+        Only the latest plan is kept for each template, so tasks that differ only in
+        their slot values do not fill the index with duplicates.
+        """
+        template, slots = extract_template(task_description)
+        vector = self._index.embed(template)
+        signatures = self._index.signatures(vector, namespace)
+
+        row = self._rows_by_template.get((namespace, template))
+        if row is None:
+            row = self._index.next_row()
+        if row < len(self._entries):
+            self._evict(row)
+
+        entry = _Entry(namespace, template, slots, copy.deepcopy(plan), signatures)
+        if row < len(self._entries):
+            self._entries[row] = entry
+        else:
+            self._entries.append(entry)
+        self._rows_by_template[(namespace, template)] = row
+        self._index.put(row, vector, signatures)
+
+    def _evict(self, row: int) -> None:
+        """Remove the entry stored in ``row`` from the lookup structures."""
+        entry = self._entries[row]
+        self._rows_by_template.pop((entry.namespace, entry.template), None)
+        self._index.discard(row, entry.signatures)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the index."""
+        return {
+            "hits": self.counts.hits,
+            "misses": self.counts.misses,
+            "hit_rate": self.counts.hit_rate,
+            "size": len(self._entries),
+        }
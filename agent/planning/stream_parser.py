@@ -0,0 +1,179 @@
+"""Module for parsing a JSON array incrementally as its text streams in."""
+
+from dataclasses import dataclass
+from typing import Any, List
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Python literals models sometimes write instead of their JSON spelling
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+def repair_json(text: str) -> str:
+    """Fix the small mistakes models make when writing JSON by hand.
+
+    Trailing commas before a closing bracket are dropped and the Python literals
+    ``True``, ``False`` and ``None`` are spelled the JSON way. Strings are left
+    untouched; anything else is left for ``json.loads`` to reject.
+    """
+    out: List[str] = []
+    in_string = escaped = False
+    pos = 0
+    while pos < len(text):
+        char = text[pos]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "}]":
+            # Drop a comma left before the closing bracket, and the whitespace after it
+            end = len(out)
+            while end and out[end - 1].isspace():
+                end -= 1
+            if end and out[end - 1] == ",":
+                del out[end - 1:]
+        elif char.isalpha():
+            end = pos
+            while end < len(text) and text[end].isalnum():
+                end += 1
+            word = text[pos:end]
+            out.append(_LITERALS.get(word, word))
+            pos = end
+            continue
+        out.append(char)
+        pos += 1
+    return "".join(out)
+
+@dataclass
+class _ScanState:
+    """Nesting depth inside the array and whether the scanner is in a string."""
+
+    depth: int = 0
+    in_string: bool = False
+    escaped: bool = False
+
+    def scan_string(self, char: str) -> None:
+        """Advance over a character inside a string."""
+        if self.escaped:
+            self.escaped = False
+        elif char == "\\":
+            self.escaped = True
+        elif char == '"':
+            self.in_string = False
+
+
+class JSONArrayStreamParser:
+    """Parses the elements of a streamed JSON array as soon as each one is complete.
+
+    The array starts at the first ``[`` followed by ``{`` or ``]``; text before it
+    (such as a Markdown code fence, a bracketed aside, or the start of an object
+    that holds the array) is ignored. Objects and arrays are returned the moment
+    their closing bracket arrives, without waiting for the following comma.
+    Elements that are not valid JSON are parsed again after ``repair_json``.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.finished = False
+        self._state = _ScanState()
+        self._element_start = None
+
+    def feed(self, text: str) -> List[Any]:
+        """Add streamed text and return the elements it completed, in order.
+
+        Raises ``json.JSONDecodeError`` (a ``ValueError``) for a malformed element.
+        """
+        if self.finished:
+            return []
+        self._buffer += text
+        elements: List[Any] = []
+        buffer = self._buffer
+        pos = self._pos
+
+        if not self._started:
+            pos = self._find_start(buffer, pos)
+        if self._started:
+            while pos < len(buffer) and not self.finished:
+                self._scan(buffer, pos, elements)
+                pos += 1
+
+        # Drop text that can no longer be part of an element
+        cut = pos if self._element_start is None else self._element_start
+        self._buffer = buffer[cut:]
+        self._pos = pos - cut
+        if self._element_start is not None:
+            self._element_start -= cut
+        return elements
+
+    def _find_start(self, buffer: str, pos: int) -> int:
+        """Look for the opening bracket of the array from ``pos``.
+
+        Returns the position after it, or the position to search again from once
+        more text has arrived.
+        """
+        while True:
+            pos = buffer.find("[", pos)
+            if pos == -1:
+                return len(buffer)
+            rest = buffer[pos + 1:].lstrip()
+            if not rest:
+                return pos
+            if rest[0] in "{]":
+                self._started = True
+                return pos + 1
+            pos += 1
+
+    def _scan(self, buffer: str, pos: int, elements: List[Any]) -> None:
+        """Advance the scanner over the character at ``pos``."""
+        char = buffer[pos]
+        state = self._state
+        if state.in_string:
+            state.scan_string(char)
+        elif char == '"':
+            state.in_string = True
+            self._mark_start(pos)
+        elif char in "{[":
+            self._mark_start(pos)
+            state.depth += 1
+        elif char in "}]":
+            if state.depth == 0:
+                # The closing bracket of the array itself
+                if char != "]":
+                    raise json.JSONDecodeError("Unexpected '}'", buffer, pos)
+                self._emit(buffer, pos, elements)
+                self.finished = True
+                return
+            state.depth -= 1
+            if state.depth == 0:
+                self._emit(buffer, pos + 1, elements)
+        elif char == "," and state.depth == 0:
+            self._emit(buffer, pos, elements)
+        elif not char.isspace():
+            self._mark_start(pos)
+
+    def _mark_start(self, pos: int) -> None:
+        if self._element_start is None and self._state.depth == 0:
+            self._element_start = pos
+
+    def _emit(self, buffer: str, end: int, elements: List[Any]) -> None:
+        if self._element_start is None:
+            return
+        text = buffer[self._element_start:end]
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError as e:
+            try:
+                element = json.loads(repair_json(text))
+            except json.JSONDecodeError:
+                raise e from None
+            logger.debug("Repaired malformed JSON element: %s", e)
+        elements.append(element)
+        self._element_start = None
@@ -1,8 +1,20 @@
+"""Module for evaluating task executions from the metrics recorded for their steps."""
+
+from typing import Any, Dict, List, Optional
+import statistics
+
 from agent.core.client import AnthropicClient
 
 class PerformanceEvaluator:
-    def __init__(self, client: AnthropicClient):
+    """Scores a task execution from the status, duration and token usage of its steps.
+
+    ``results`` is the ``results`` list returned by ``Agent.process_task``; each step
+    result carries the ``metrics`` recorded while it ran.
+    """
+
+    def __init__(self, client: Optional[AnthropicClient] = None, outlier_factor: float = 2.0):
         self.client = client
+        self.outlier_factor = outlier_factor
 
     async def evaluate_execution(self, _task, _results):
         """Analyze the execution of a task and identify improvement areas"""
@@ -10,25 +22,78 @@ class PerformanceEvaluator:
         # Extract success/failure patterns
         steps_analysis = self._analyze_steps(_results)
 
-        # Generate insights using the LLM
+        # Derive insights from the per-step metrics
         insights = await self._generate_insights(_task, _results, steps_analysis)
 
         return {
             "effectiveness_score": steps_analysis["effectiveness_score"],
+            "success_rate": steps_analysis["success_rate"],
+            "time_per_step": steps_analysis["time_per_step"],
+            "tokens_per_step": steps_analysis["tokens_per_step"],
             "improvement_areas": insights["improvement_areas"],
             "successful_patterns": insights["successful_patterns"]
         }
 
     def _analyze_steps(self, _results):
-        # Calculate success rate, execution time, etc.
-        # Identify which steps succeeded/failed
+        """Compute the success rate, time per step and tokens per step."""
+        steps = []
+        for item in _results:
+            result = item["result"]
+            step_metrics = result.get("metrics", {})
+            steps.append({
+                "step_id": item["step"]["step_id"],
+                "tool": item["step"].get("tool_name"),
+                "succeeded": result.get("status") == "success",
+                "error": result.get("error"),
+                "duration": step_metrics.get("duration", 0.0),
+                "tokens": (
+                    step_metrics.get("input_tokens", 0) + step_metrics.get("output_tokens", 0)),
+            })
+
+        if not steps:
+            return {
+                "effectiveness_score": 0.0,
+                "success_rate": 0.0,
+                "time_per_step": 0.0,
+                "tokens_per_step": 0.0,
+                "steps": steps,
+            }
+
+        success_rate = sum(step["succeeded"] for step in steps) / len(steps)
         return {
-            "effectiveness_score": 0.95,
+            "effectiveness_score": round(success_rate, 3),
+            "success_rate": success_rate,
+            "time_per_step": statistics.fmean(step["duration"] for step in steps),
+            "tokens_per_step": statistics.fmean(step["tokens"] for step in steps),
+            "steps": steps,
         }
 
     async def _generate_insights(self, _task, _results, _analysis):
-        # Use the LLM to reflect on what worked, what didn't, and why
+        """Point out failed steps and steps that are outliers in time or tokens."""
+        steps: List[Dict[str, Any]] = _analysis["steps"]
+        improvement_areas = []
+        successful_patterns = []
+
+        for step in steps:
+            if not step["succeeded"]:
+                improvement_areas.append(f"Step {step['step_id']} failed: {step['error']}")
+
+        for key, unit, label in (("duration", "s", "took"), ("tokens", " tokens", "used")):
+            median = statistics.median(step[key] for step in steps) if steps else 0
+            for step in steps:
+                if median and step[key] > self.outlier_factor * median:
+                    improvement_areas.append(
+                        f"Step {step['step_id']} {label} {step[key]:.4g}{unit}, "
+                        f"{step[key] / median:.1f}x the median step")
+
+        for step in steps:
+            if step["tool"] and step["succeeded"] and not step["tokens"]:
+                successful_patterns.append(
+                    f"Step {step['step_id']} was answered by {step['tool']} without a model call")
+        if steps and all(step["succeeded"] for step in steps):
+            successful_patterns.append(f"All {len(steps)} steps succeeded")
+
         return {
-            "improvement_areas": ["Step 2 could have been more efficient", "Step 3 was not necessary"],
-            "successful_patterns": ["Step 1 was executed flawlessly"]
+            "improvement_areas": improvement_areas,
+            "successful_patterns": successful_patterns
         }
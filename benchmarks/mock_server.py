@@ -0,0 +1,363 @@
+"""Local stand-in for the Anthropic messages API and the web search backend.
+
+Run it with ``python -m benchmarks.mock_server`` and point the agent at it with
+``ANTHROPIC_BASE_URL=http://127.0.0.1:<port>``, ``SEARCH_BACKEND=http`` and
+``SEARCH_ENDPOINT=http://127.0.0.1:<port>/search``.
+"""
+
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import argparse
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Latency:
+    """A latency distribution in milliseconds.
+
+    ``kind`` is ``fixed`` (always ``a``), ``uniform`` (between ``a`` and ``b``) or
+    ``lognormal`` (median ``a`` with shape ``b``).
+    """
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """Parse ``kind:a[:b]``, for example ``lognormal:200:0.5``."""
+        kind, *values = spec.split(":")
+        if kind not in ("fixed", "uniform", "lognormal") or not 1 <= len(values) <= 2:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        numbers = [float(value) for value in values] + [0.0]
+        return cls(kind, numbers[0], numbers[1])
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency in seconds."""
+        if self.kind == "uniform":
+            millis = rng.uniform(self.a, self.b)
+        elif self.kind == "lognormal":
+            millis = self.a * rng.lognormvariate(0.0, self.b)
+        else:
+            millis = self.a
+        return max(0.0, millis) / 1000
+
+
+DEFAULT_PLANS: Dict[str, List[Dict[str, Any]]] = {
+    "calc": [
+        {"step_id": 1, "description": "Compute the final amount", "requires_tool": True,
+         "tool_name": "calculator", "tool_parameters": {"expression": "4000 * (1 + 0.045)**5"},
+         "depends_on": []},
+        {"step_id": 2, "description": "Explain the result", "requires_tool": False,
+         "tool_name": None, "tool_parameters": None, "depends_on": [1]},
+    ],
+    "search": [
+        {"step_id": 1, "description": "Search for sources", "requires_tool": True,
+         "tool_name": "web_search", "tool_parameters": {"query": "benchmark topic"},
+         "depends_on": []},
+        {"step_id": 2, "description": "Summarize the sources", "requires_tool": False,
+         "tool_name": None, "tool_parameters": None, "depends_on": [1]},
+    ],
+    "reasoning": [
+        {"step_id": 1, "description": "List the advantages", "requires_tool": False,
+         "tool_name": None, "tool_parameters": None, "depends_on": []},
+        {"step_id": 2, "description": "List the disadvantages", "requires_tool": False,
+         "tool_name": None, "tool_parameters": None, "depends_on": []},
+        {"step_id": 3, "description": "Weigh them against each other", "requires_tool": False,
+         "tool_name": None, "tool_parameters": None, "depends_on": [1, 2]},
+    ],
+}
+
+DEFAULT_ANSWER = (
+    "Here is a short, canned answer produced by the mock server. It stands in for the "
+    "model's reasoning so that benchmarks exercise the same code paths without the API."
+)
+
+
+@dataclass
+class Payloads:
+    """Canned replies of the mock server.
+
+    Plans are chosen by the first keyword of ``plan_keywords`` found in the task to
+    plan, falling back to the ``reasoning`` plan.
+    """
+    plans: Dict[str, List[Dict[str, Any]]] = field(default_factory=lambda: dict(DEFAULT_PLANS))
+    plan_keywords: Dict[str, str] = field(
+        default_factory=lambda: {"calculate": "calc", "search": "search"})
+    answer: str = DEFAULT_ANSWER
+
+    def load(self, path: str) -> None:
+        """Override the ``plans``, ``plan_keywords`` and ``answer`` from a JSON file."""
+        with open(path, encoding="utf-8") as f:
+            payloads = json.load(f)
+        self.plans.update(payloads.get("plans", {}))
+        self.plan_keywords.update(payloads.get("plan_keywords", {}))
+        self.answer = payloads.get("answer", self.answer)
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server."""
+    llm_latency: Latency = field(default_factory=Latency)
+    search_latency: Latency = field(default_factory=Latency)
+    stream_chunk_delay: float = 0.0
+    llm_error_rate: float = 0.0
+    search_error_rate: float = 0.0
+    payloads: Payloads = field(default_factory=Payloads)
+    seed: Optional[int] = None
+
+
+def _text_of(content: Any) -> str:
+    """Flatten a message ``system`` or ``content`` field to plain text."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content or [])
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering ``POST /v1/messages`` and ``GET /search``."""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self, latency: Latency, error_rate: float):
+        """Return a latency in seconds and whether the request should fail."""
+        with self._rng_lock:
+            return latency.sample(self._rng), self._rng.random() < error_rate
+
+    def reply_for(self, body: Dict[str, Any]) -> str:
+        """Pick the canned reply for a messages request."""
+        if "task planner" in _text_of(body.get("system")):
+            user = _text_of(body["messages"][-1]["content"]).lower()
+            plan_name = "reasoning"
+            for keyword, name in self.config.payloads.plan_keywords.items():
+                if keyword in user:
+                    plan_name = name
+                    break
+            return json.dumps(self.config.payloads.plans[plan_name])
+        return self.config.payloads.answer
+
+    def next_id(self) -> str:
+        """Return a new message id."""
+        return f"msg_mock_{next(self._ids)}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockServer
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        logger.debug(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):  # pylint: disable=invalid-name
+        self._send(200, b"")
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        url = urlparse(self.path)
+        if url.path != "/search":
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        config = self.server.config
+        delay, fail = self.server.draw(config.search_latency, config.search_error_rate)
+        time.sleep(delay)
+        if fail:
+            self._send(500, b'{"error": "mock search failure"}')
+            return
+
+        params = parse_qs(url.query)
+        query = params.get("q", [""])[0]
+        num = int(params.get("num", ["5"])[0])
+        items = [
+            {
+                "title": f"Result {i + 1} for {query}",
+                "link": f"https://example.com/{i + 1}",
+                "snippet": f"Snippet {i + 1} about {query}.",
+            }
+            for i in range(num)
+        ]
+        self._send(200, json.dumps({"items": items}).encode("utf-8"))
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        if urlparse(self.path).path != "/v1/messages":
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        config = self.server.config
+        delay, fail = self.server.draw(config.llm_latency, config.llm_error_rate)
+        time.sleep(delay)
+        if fail:
+            error = {
+                "type": "error",
+                "error": {"type": "overloaded_error", "message": "Overloaded"},
+            }
+            self._send(529, json.dumps(error).encode("utf-8"))
+            return
+
+        text = self.server.reply_for(body)
+        tool_choice = body.get("tool_choice") or {}
+        if tool_choice.get("type") == "tool":
+            # A forced tool call; the canned reply becomes the tool's input
+            if tool_choice["name"] == "submit_plan":
+                reply = {"steps": json.loads(text)}
+            else:
+                reply = {"text": text}
+            text = json.dumps(reply)
+            block = {"type": "tool_use", "id": f"toolu_{self.server.next_id()}",
+                     "name": tool_choice["name"], "input": reply}
+            stop_reason = "tool_use"
+        else:
+            block = {"type": "text", "text": text}
+            stop_reason = "end_turn"
+        usage = {
+            "input_tokens": (
+                len(_text_of(body.get("system")))
+                + sum(len(_text_of(m["content"])) for m in body.get("messages", []))) // 4,
+            "output_tokens": len(text) // 4,
+        }
+        message = {
+            "id": self.server.next_id(),
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "mock"),
+            "content": [block],
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": usage,
+        }
+        if body.get("stream"):
+            self._stream(message, text)
+        else:
+            self._send(200, json.dumps(message).encode("utf-8"))
+
+    def _stream(self, message: Dict[str, Any], text: str) -> None:
+        """Send ``message`` as server-sent events, a few words per delta.
+
+        For a tool call, ``text`` is the JSON of the tool's input.
+        """
+        words = text.split(" ")
+        deltas = [" ".join(words[i:i + 4]) + " " for i in range(0, len(words), 4)]
+        deltas[-1] = deltas[-1].rstrip(" ")
+        start = dict(message, content=[], stop_reason=None)
+        start["usage"] = dict(message["usage"], output_tokens=0)
+        block = message["content"][0]
+        if block["type"] == "tool_use":
+            block = dict(block, input={})
+            delta_type, field_name = "input_json_delta", "partial_json"
+        else:
+            block = {"type": "text", "text": ""}
+            delta_type, field_name = "text_delta", "text"
+        events = [
+            {"type": "message_start", "message": start},
+            {"type": "content_block_start", "index": 0, "content_block": block},
+        ]
+        for delta in deltas:
+            events.append({"type": "content_block_delta", "index": 0,
+                           "delta": {"type": delta_type, field_name: delta}})
+        events.append({"type": "content_block_stop", "index": 0})
+        events.append({"type": "message_delta",
+                       "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                       "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+        events.append({"type": "message_stop"})
+        chunks = [
+            f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+            for event in events
+        ]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(sum(len(chunk) for chunk in chunks)))
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            if self.server.config.stream_chunk_delay:
+                time.sleep(self.server.config.stream_chunk_delay)
+
+
+def start_server(config: MockConfig, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    """Start a mock server on a background thread and return it."""
+    server = MockServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, name="mock-server", daemon=True)
+    thread.start()
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options of the mock server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument(
+        "--llm-latency", type=Latency.parse, default=Latency("lognormal", 50, 0.3),
+        help="kind:a[:b] in ms, e.g. fixed:100, uniform:50:150, lognormal:200:0.5")
+    parser.add_argument("--search-latency", type=Latency.parse, default=Latency("fixed", 20))
+    parser.add_argument(
+        "--stream-chunk-delay", type=float, default=0.002,
+        help="seconds between streamed events")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--search-error-rate", type=float, default=0.0)
+    parser.add_argument("--payloads", help="JSON file with canned plans and answers")
+    parser.add_argument("--seed", type=int)
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    """Build a ``MockConfig`` from parsed command line options."""
+    config = MockConfig(
+        llm_latency=args.llm_latency,
+        search_latency=args.search_latency,
+        stream_chunk_delay=args.stream_chunk_delay,
+        llm_error_rate=args.llm_error_rate,
+        search_error_rate=args.search_error_rate,
+        seed=args.seed,
+    )
+    if args.payloads:
+        config.payloads.load(args.payloads)
+    return config
+
+
+def main():
+    """Run the mock server until interrupted."""
+    args = build_parser().parse_args()
+    server = MockServer((args.host, args.port), config_from_args(args))
+    # The benchmark runner reads the URL from the first line of output
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
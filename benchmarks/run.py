@@ -0,0 +1,311 @@
+"""End-to-end throughput benchmark of the agent against the local mock server.
+
+Example::
+
+    python -m benchmarks.run --mix calc mixed --concurrency 1 8 32 --tasks 100 \\
+        --output benchmarks/results.json --baseline benchmarks/baseline.json
+
+Arguments the runner does not know are passed on to the mock server, for example
+``--llm-latency lognormal:400:0.5 --llm-error-rate 0.01``.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.stats import percentiles
+
+logger = logging.getLogger(__name__)
+
+TASK_TEMPLATES = {
+    "calc": "Calculate the compound interest on ${amount} with {rate}% annual interest "
+            "rate for {years} years",
+    "search": "Search the web for recent news about {topic} and summarize it ({n})",
+    "reasoning": "Explain the trade-offs of {topic} for a small team ({n})",
+}
+
+MIXES = {
+    "calc": ["calc"],
+    "search": ["search"],
+    "reasoning": ["reasoning"],
+    "mixed": ["calc", "search", "reasoning"],
+}
+
+TOPICS = ["microservices", "serverless", "event sourcing", "GraphQL", "edge caching"]
+
+# Metrics where a larger value is a regression; everything else regresses when it drops
+_HIGHER_IS_WORSE = ("p50", "p95", "p99", "peak_rss_mb", "failed")
+
+def make_tasks(mix: str, count: int, seed: int = 0) -> List[str]:
+    """Generate ``count`` distinct task descriptions drawn from ``mix``."""
+    rng = random.Random(seed)
+    kinds = MIXES[mix]
+    tasks = []
+    for n in range(count):
+        template = TASK_TEMPLATES[kinds[n % len(kinds)]]
+        tasks.append(template.format(
+            amount=rng.randrange(1_000, 100_000),
+            rate=rng.randrange(1, 20) / 2,
+            years=rng.randrange(1, 30),
+            topic=rng.choice(TOPICS),
+            n=n,
+        ))
+    return tasks
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+async def _timed_task(agent, description: str, stages: Dict[str, List[float]]) -> bool:
+    """Run one task through ``Agent.stream_task``, recording the time spent per stage."""
+    from agent.core import events  # pylint: disable=import-outside-toplevel
+
+    start = time.perf_counter()
+    last_step_end = None
+    step_starts = {}
+    first_delta = None
+    succeeded = False
+    async for event in agent.stream_task(description):
+        now = time.perf_counter()
+        if isinstance(event, events.PlanReady):
+            stages["plan"].append(now - start)
+            last_step_end = now
+        elif isinstance(event, events.StepStarted):
+            step_starts[event.step["step_id"]] = now
+        elif isinstance(event, events.StepFinished):
+            kind = "tool_step" if event.step.get("requires_tool") else "thinking_step"
+            stages[kind].append(now - step_starts[event.step["step_id"]])
+            last_step_end = now
+        elif isinstance(event, events.ResponseDelta) and first_delta is None:
+            first_delta = now
+            stages["summary_first_token"].append(now - last_step_end)
+        elif isinstance(event, events.TaskFinished):
+            succeeded = event.result.get("status") == "completed"
+            if succeeded:
+                stages["summary"].append(now - last_step_end)
+                stages["task"].append(now - start)
+    return succeeded
+
+async def run_scenario(mix: str, concurrency: int, count: int, seed: int = 0) -> Dict[str, Any]:
+    """Process ``count`` tasks of ``mix`` with at most ``concurrency`` running at once."""
+    from agent.core.agent import Agent  # pylint: disable=import-outside-toplevel
+
+    agent = Agent()
+    stages: Dict[str, List[float]] = {
+        name: [] for name in (
+            "plan", "tool_step", "thinking_step", "summary_first_token", "summary", "task")
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def _one(description: str) -> None:
+        nonlocal failed
+        async with semaphore:
+            try:
+                if not await _timed_task(agent, description, stages):
+                    failed += 1
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning("Task failed: %s", e)
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_one(task) for task in make_tasks(mix, count, seed)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mix": mix,
+        "concurrency": concurrency,
+        "tasks": count,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 3),
+        "tasks_per_sec": round((count - failed) / elapsed, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {name: percentiles(values) for name, values in stages.items()},
+    }
+
+
+def compare(
+        current: Dict[str, Any], baseline: Dict[str, Any],
+        tolerance: float) -> List[str]:
+    """Return a description of every metric that is worse than ``baseline`` by more
+    than ``tolerance`` (a fraction), for scenarios present in both results."""
+    previous = {(run["mix"], run["concurrency"]): run for run in baseline["runs"]}
+    regressions = []
+    for run in current["runs"]:
+        old = previous.get((run["mix"], run["concurrency"]))
+        if old is None:
+            continue
+        label = f"{run['mix']} @ concurrency {run['concurrency']}"
+
+        metrics = [
+            ("tasks_per_sec", run["tasks_per_sec"], old["tasks_per_sec"]),
+            ("peak_rss_mb", run["peak_rss_mb"], old["peak_rss_mb"]),
+            ("failed", run["failed"], old["failed"]),
+        ]
+        for stage, stats in run["stages"].items():
+            old_stats = old["stages"].get(stage, {})
+            for name in ("p50", "p95", "p99"):
+                if name in stats and name in old_stats:
+                    metrics.append((f"{stage}.{name}", stats[name], old_stats[name]))
+
+        regressions.extend(_regressions(label, metrics, tolerance))
+
+    if "startup" in current and "startup" in baseline:
+        metrics = []
+        for stage, stats in current["startup"]["stages"].items():
+            old_stats = baseline["startup"]["stages"].get(stage, {})
+            for name in ("p50", "p95"):
+                if name in old_stats:
+                    metrics.append((f"{stage}.{name}", stats[name], old_stats[name]))
+        regressions.extend(_regressions("startup", metrics, tolerance))
+    return regressions
+
+def _regressions(
+        label: str, metrics: List[Tuple[str, float, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for name, value, old_value in metrics:
+        if name.endswith(_HIGHER_IS_WORSE):
+            worse = value > old_value * (1 + tolerance) and value > old_value
+        else:
+            worse = value < old_value * (1 - tolerance)
+        if worse:
+            regressions.append(f"{label}: {name} {old_value} -> {value}")
+    return regressions
+
+
+def start_mock_server(mock_args: List[str]) -> Tuple[subprocess.Popen, str]:
+    """Start the mock server in a separate process so it does not skew the results.
+
+    Returns the process and the server's base URL.
+    """
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", "benchmarks.mock_server", *mock_args],
+        stdout=subprocess.PIPE, text=True,
+    )
+    url = process.stdout.readline().strip()
+    if not url:
+        process.kill()
+        raise RuntimeError("Mock server failed to start")
+    return process, url
+
+def configure_environment(server_url: str, plan_cache: bool) -> None:
+    """Point the agent at the mock server; must run before the agent is imported."""
+    os.environ["ANTHROPIC_BASE_URL"] = server_url
+    os.environ["SEARCH_BACKEND"] = "http"
+    os.environ["SEARCH_ENDPOINT"] = f"{server_url}/search"
+    os.environ["STATE_STORE_PATH"] = ""
+    os.environ["RESPONSE_CACHE_MODE"] = "off"
+    os.environ["PLAN_CACHE_ENABLED"] = str(plan_cache).lower()
+    os.environ["SIMILAR_PLAN_CACHE_ENABLED"] = str(plan_cache).lower()
+    for name in ("ANTHROPIC_API_KEY", "GOOGLE_API_KEY", "SEARCH_ENGINE_ID"):
+        os.environ.setdefault(name, "mock")
+
+async def run_all(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every combination of mix and concurrency level."""
+    from agent.core.client import get_client_pool  # pylint: disable=import-outside-toplevel
+
+    runs = []
+    try:
+        for mix in args.mix:
+            for concurrency in args.concurrency:
+                result = await run_scenario(mix, concurrency, args.tasks, args.seed)
+                print(
+                    f"{mix:>10} x{concurrency:<4} {result['tasks_per_sec']:>9.2f} tasks/s  "
+                    f"p95 task {result['stages']['task'].get('p95', 0):>9.1f} ms  "
+                    f"failed {result['failed']:>3}  rss {result['peak_rss_mb']} MiB",
+                    flush=True,
+                )
+                runs.append(result)
+    finally:
+        await get_client_pool().aclose()
+
+    return {
+        "meta": {
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tasks": args.tasks,
+            "plan_cache": args.plan_cache,
+            "mock_args": args.mock_args,
+        },
+        "runs": runs,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options of the benchmark runner."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mix", nargs="+", choices=sorted(MIXES), default=["mixed"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--tasks", type=int, default=50, help="tasks per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--plan-cache", action="store_true",
+        help="keep the plan caches on; by default every task is planned by the model")
+    parser.add_argument(
+        "--startup-runs", type=int, default=5,
+        help="fresh interpreters used to time startup; 0 skips the startup benchmark")
+    parser.add_argument("--server", help="use an already running mock server at this URL")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="allowed relative change before a metric counts as a regression")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks; exit with status 1 if a regression was found."""
+    logging.basicConfig(level=logging.WARNING)
+    args, mock_args = build_parser().parse_known_args(argv)
+    args.mock_args = [arg for arg in mock_args if arg != "--"]
+
+    server = None
+    server_url = args.server
+    if server_url is None:
+        server, server_url = start_mock_server(args.mock_args)
+    try:
+        configure_environment(server_url, args.plan_cache)
+        results = asyncio.run(run_all(args))
+        if args.startup_runs:
+            # pylint: disable=import-outside-toplevel
+            from benchmarks.startup import format_startup, measure_startup
+
+            results["startup"] = measure_startup(args.startup_runs)
+            print(format_startup(results["startup"]), flush=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
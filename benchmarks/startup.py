@@ -0,0 +1,93 @@
+"""Startup benchmark: how long importing the agent and building an ``Agent`` take.
+
+Every sample runs in a fresh interpreter, since modules are only imported once per
+process. Example::
+
+    python -m benchmarks.startup --runs 10
+"""
+
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.stats import percentiles
+
+# Runs in the child interpreter; prints the duration of each stage in seconds
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import agent.core.agent
+imported = time.perf_counter()
+agent.core.agent.Agent()
+created = time.perf_counter()
+heavy = sorted(name for name in ("anthropic", "numpy", "googleapiclient") if name in sys.modules)
+print(json.dumps({
+    "import": imported - start,
+    "agent": created - imported,
+    "loaded": heavy,
+}))
+"""
+
+# Stages timed in every run, the whole interpreter lifetime included
+STAGES = ("import", "agent", "process")
+
+def _sample(env: Dict[str, str]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    sample = json.loads(output.strip().splitlines()[-1])
+    sample["process"] = time.perf_counter() - start
+    return sample
+
+def measure_startup(runs: int = 5) -> Dict[str, Any]:
+    """Start ``runs`` fresh interpreters and return percentiles of every stage in ms.
+
+    ``loaded`` lists the heavy optional modules that were imported at startup,
+    which should stay empty.
+    """
+    env = dict(os.environ)
+    for name in ("ANTHROPIC_API_KEY", "GOOGLE_API_KEY", "SEARCH_ENGINE_ID"):
+        env.setdefault(name, "mock")
+    env["STATE_STORE_PATH"] = ""
+    # The first run also writes bytecode caches; it is not counted
+    _sample(env)
+    samples: List[Dict[str, Any]] = [_sample(env) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "stages": {
+            stage: percentiles([sample[stage] for sample in samples]) for stage in STAGES},
+        "loaded": sorted({name for sample in samples for name in sample["loaded"]}),
+    }
+
+def format_startup(result: Dict[str, Any]) -> str:
+    """One line per stage with its median and p95."""
+    lines = [
+        f"{'startup ' + stage:>20} p50 {stats['p50']:>8.1f} ms  p95 {stats['p95']:>8.1f} ms"
+        for stage, stats in result["stages"].items()
+    ]
+    if result["loaded"]:
+        lines.append(f"{'loaded at startup':>20} {', '.join(result['loaded'])}")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the startup times, optionally saving them as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    result = measure_startup(args.runs)
+    print(format_startup(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
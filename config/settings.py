@@ -1,16 +1,20 @@
 """Module for managing configuration settings."""
 
+from typing import Any, Optional
+import threading
+
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
-# Load environment variables from .env file
-load_dotenv(override=True)
-
 class Settings(BaseSettings):
     """Class for managing configuration settings."""
 
     anthropic_api_key: str = Field(..., env='ANTHROPIC_API_KEY')
+    anthropic_base_url: Optional[str] = Field(
+        default=None,
+        env='ANTHROPIC_BASE_URL'
+    )
     anthropic_model: str = Field(
         default="claude-3-7-sonnet-20250219",
         env='ANTHROPIC_MODEL'
@@ -19,6 +23,18 @@ class Settings(BaseSettings):
         default="claude-3-haiku-20240307",
         env='PLANNING_MODEL'
     )
+    fast_model: str = Field(
+        default="claude-3-haiku-20240307",
+        env='FAST_MODEL'
+    )
+    model_cascade_enabled: bool = Field(
+        default=True,
+        env='MODEL_CASCADE_ENABLED'
+    )
+    cascade_min_output_chars: int = Field(
+        default=20,
+        env='CASCADE_MIN_OUTPUT_CHARS'
+    )
     max_tokens_response: int = Field(
         default=4096,
         env='MAX_TOKENS_RESPONSE'
@@ -27,16 +43,191 @@ class Settings(BaseSettings):
         default=0.2,
         env='PLANNING_TEMPERATURE'
     )
+    structured_planning_enabled: bool = Field(
+        default=True,
+        env='STRUCTURED_PLANNING_ENABLED'
+    )
     execution_temperature: float = Field(
         default=0.7,
         env='EXECUTION_TEMPERATURE'
     )
+    anthropic_max_connections: int = Field(
+        default=100,
+        env='ANTHROPIC_MAX_CONNECTIONS'
+    )
+    anthropic_max_keepalive_connections: int = Field(
+        default=20,
+        env='ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS'
+    )
+    anthropic_keepalive_expiry: float = Field(
+        default=30.0,
+        env='ANTHROPIC_KEEPALIVE_EXPIRY'
+    )
+    plan_cache_enabled: bool = Field(
+        default=True,
+        env='PLAN_CACHE_ENABLED'
+    )
+    plan_cache_size: int = Field(
+        default=1024,
+        env='PLAN_CACHE_SIZE'
+    )
+    plan_cache_ttl: float = Field(
+        default=3600.0,
+        env='PLAN_CACHE_TTL'
+    )
+    plan_cache_path: Optional[str] = Field(
+        default=None,
+        env='PLAN_CACHE_PATH'
+    )
+    similar_plan_cache_enabled: bool = Field(
+        default=False,
+        env='SIMILAR_PLAN_CACHE_ENABLED'
+    )
+    similar_plan_threshold: float = Field(
+        default=0.95,
+        env='SIMILAR_PLAN_THRESHOLD'
+    )
+    similar_plan_cache_size: int = Field(
+        default=100_000,
+        env='SIMILAR_PLAN_CACHE_SIZE'
+    )
+    fast_path_enabled: bool = Field(
+        default=True,
+        env='FAST_PATH_ENABLED'
+    )
+    progressive_summary_enabled: bool = Field(
+        default=False,
+        env='PROGRESSIVE_SUMMARY_ENABLED'
+    )
+    progressive_summary_max_words: int = Field(
+        default=200,
+        env='PROGRESSIVE_SUMMARY_MAX_WORDS'
+    )
+    memory_capacity: int = Field(
+        default=10_000,
+        env='MEMORY_CAPACITY'
+    )
+    memory_context_limit: int = Field(
+        default=10,
+        env='MEMORY_CONTEXT_LIMIT'
+    )
+    max_input_tokens: int = Field(
+        default=16_000,
+        env='MAX_INPUT_TOKENS'
+    )
+    prompt_caching_enabled: bool = Field(
+        default=True,
+        env='PROMPT_CACHING_ENABLED'
+    )
+    response_cache_mode: str = Field(
+        default="off",
+        env='RESPONSE_CACHE_MODE'
+    )
+    response_cache_dir: str = Field(
+        default=".cache/responses",
+        env='RESPONSE_CACHE_DIR'
+    )
+    response_cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        env='RESPONSE_CACHE_MAX_BYTES'
+    )
+    response_cache_max_temperature: float = Field(
+        default=0.3,
+        env='RESPONSE_CACHE_MAX_TEMPERATURE'
+    )
+    state_store_path: Optional[str] = Field(
+        default=None,
+        env='STATE_STORE_PATH'
+    )
+    max_parallel_steps: int = Field(
+        default=4,
+        env='MAX_PARALLEL_STEPS'
+    )
+    max_concurrent_tasks: int = Field(
+        default=8,
+        env='MAX_CONCURRENT_TASKS'
+    )
     google_api_key: str = Field(..., env='GOOGLE_API_KEY')
     search_engine_id: str = Field(..., env='SEARCH_ENGINE_ID')
+    search_backend: str = Field(
+        default="google",
+        env='SEARCH_BACKEND'
+    )
+    search_endpoint: Optional[str] = Field(
+        default=None,
+        env='SEARCH_ENDPOINT'
+    )
+    search_max_workers: int = Field(
+        default=4,
+        env='SEARCH_MAX_WORKERS'
+    )
+    task_timeout: Optional[float] = Field(
+        default=300.0,
+        env='TASK_TIMEOUT'
+    )
+    planning_budget_fraction: float = Field(
+        default=0.3,
+        env='PLANNING_BUDGET_FRACTION'
+    )
+    summary_budget_fraction: float = Field(
+        default=0.15,
+        env='SUMMARY_BUDGET_FRACTION'
+    )
+    step_timeout: Optional[float] = Field(
+        default=120.0,
+        env='STEP_TIMEOUT'
+    )
+    tool_process_pool_enabled: bool = Field(
+        default=False,
+        env='TOOL_PROCESS_POOL_ENABLED'
+    )
+    tool_process_workers: int = Field(
+        default=2,
+        env='TOOL_PROCESS_WORKERS'
+    )
+    tool_call_timeout: float = Field(
+        default=10.0,
+        env='TOOL_CALL_TIMEOUT'
+    )
+    tool_memory_limit_mb: int = Field(
+        default=512,
+        env='TOOL_MEMORY_LIMIT_MB'
+    )
 
     class Config:
         """Pydantic config."""
         env_file = ".env"
         env_file_encoding = "utf-8"
 
-settings = Settings()
+class LazySettings:
+    """Proxy for the ``Settings``, which are only loaded on first attribute access.
+
+    Importing this module therefore neither reads the ``.env`` file nor validates
+    the environment, and variables set after the import still take effect.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_settings", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def load(self) -> Settings:
+        """Return the settings, loading the environment and ``.env`` file once."""
+        if self._settings is None:
+            with self._lock:
+                if self._settings is None:
+                    # Load environment variables from .env file
+                    load_dotenv(override=True)
+                    object.__setattr__(self, "_settings", Settings())
+        return self._settings
+
+    def reload(self) -> None:
+        """Forget the loaded settings so the next access reads the environment again."""
+        object.__setattr__(self, "_settings", None)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.load(), name, value)
+
+settings = LazySettings()
@@ -4,6 +4,7 @@ import asyncio
 import logging
 import sys
 from agent.core.agent import Agent
+from agent.core.client import get_client_pool
 
 def setup_logging(debug: bool = False):
     """Configure logging for the application."""
@@ -28,20 +29,39 @@ async def main():
     setup_logging(debug=True)
     logger = logging.getLogger(__name__)
 
-    max_retries = 3
+    # Build the agent and its pooled API connections once, not on every retry
+    logger.info("Initializing agent...")
+    agent = Agent()
+    pool = get_client_pool()
+    await pool.warm_up()
+
+    try:
+        await run_with_retries(agent, logger)
+    finally:
+        await pool.aclose()
+
+async def run_with_retries(agent: Agent, logger: logging.Logger, max_retries: int = 3):
+    """Run the sample task, retrying with backoff on failure."""
     for attempt in range(max_retries):
         try:
-            logger.info("Initializing agent...")
-            agent = Agent()
-
             # Test with a simple task
             task = """
             Calculate the compound interest on $4000 with 4.5% annual interest rate for 5 years
             """
-            logger.info("Processing task: %s", task)
-            result = await agent.process_task(task)
+            if attempt > 0 and agent.state.current_task_id:
+                # Pick up where the failed attempt stopped instead of starting over
+                logger.info("Resuming task: %s", agent.state.current_task_id)
+                result = await agent.resume_task(agent.state.current_task_id)
+            else:
+                logger.info("Processing task: %s", task)
+                result = await agent.process_task(task)
 
-            logger.info("Task completed successfully")
+            if result["status"] == "timed_out":
+                logger.warning(
+                    "Task ran out of time during %s; showing partial results",
+                    result["timed_out_stage"])
+            else:
+                logger.info("Task completed successfully")
             print("\n=== Final Response ===")
             print(result["final_response"])
 
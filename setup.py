@@ -12,5 +12,6 @@ setup(
         "anthropic",
         "pydantic>=2.0.0",
         "python-dotenv",
+        "numpy",
     ],
 )
@@ -0,0 +1,48 @@
+"""Shared fixtures: settings that need no credentials and a canned model."""
+
+import json
+import os
+
+import pytest
+
+# Settings are read on import, so they must be in place before the agent is loaded
+for _name in ("ANTHROPIC_API_KEY", "GOOGLE_API_KEY", "SEARCH_ENGINE_ID"):
+    os.environ.setdefault(_name, "test")
+os.environ["STATE_STORE_PATH"] = ""
+os.environ["RESPONSE_CACHE_MODE"] = "off"
+os.environ["TOOL_PROCESS_POOL_ENABLED"] = "false"
+
+# pylint: disable=wrong-import-position
+from agent.core.client import AnthropicClient
+
+PLAN = [
+    {"step_id": 1, "description": "Think about the question", "requires_tool": False,
+     "tool_name": None, "tool_parameters": None, "depends_on": []},
+    {"step_id": 2, "description": "Compute the power", "requires_tool": True,
+     "tool_name": "calculator", "tool_parameters": {"expression": "2**10"}, "depends_on": []},
+    {"step_id": 3, "description": "Combine the results", "requires_tool": False,
+     "tool_name": None, "tool_parameters": None, "depends_on": [1, 2]},
+]
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Answer every model request locally, planning every task with ``PLAN``.
+
+    Returns the list of ``(system_prompt, user_message)`` pairs sent to the model.
+    """
+    calls = []
+
+    async def complete_async(_self, system_prompt, user_message, *_args, **_kwargs):
+        calls.append((str(system_prompt), str(user_message)))
+        if "planner" in str(system_prompt):
+            return json.dumps(PLAN)
+        return f"Answer {len(calls)}"
+
+    async def stream(self, system_prompt, user_message, *args, **kwargs):
+        yield await complete_async(self, system_prompt, user_message, *args, **kwargs)
+
+    monkeypatch.setattr(AnthropicClient, "complete_async", complete_async)
+    monkeypatch.setattr(AnthropicClient, "stream_async", stream)
+    monkeypatch.setattr(AnthropicClient, "stream_tool_input_async", stream)
+    return calls
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from tools.calculator import Calculator
+
+
+def _calculate(expression, calculator=None):
+    return asyncio.run((calculator or Calculator()).execute({"expression": expression}))
+
+
+@pytest.mark.parametrize("expression", ["9**9**9", "2**2**40", "3**10000", "(-7)**100000"])
+def test_huge_powers_are_refused_instead_of_computed(expression):
+    assert "too large" in _calculate(expression)["error"]
+
+
+@pytest.mark.parametrize("expression, result", [
+    ("2**70", 2 ** 70), ("10**3000", 10 ** 3000), ("1**100000000", 1), ("2**-2", 0.25),
+])
+def test_reasonable_powers_are_exact(expression, result):
+    assert _calculate(expression) == {"result": result}
+
+
+def test_memory_error_is_reported_in_process(monkeypatch):
+    calculator = Calculator()
+
+    def exhausted(*_args, **_kwargs):
+        raise MemoryError
+
+    monkeypatch.setattr(calculator, "_get_compiled", exhausted)
+
+    assert "too much memory" in _calculate("1 + 1", calculator)["error"]
+
+
+def test_memory_error_is_left_to_the_worker(monkeypatch):
+    calculator = Calculator()
+    calculator.in_worker = True
+
+    def exhausted(*_args, **_kwargs):
+        raise MemoryError
+
+    monkeypatch.setattr(calculator, "_get_compiled", exhausted)
+
+    with pytest.raises(MemoryError):
+        _calculate("1 + 1", calculator)
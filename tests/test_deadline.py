@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+
+from agent.core.deadline import (
+    Deadline, DeadlineExceeded, current_deadline, deadline_scope, iterate_with_deadline,
+    with_deadline)
+from agent.core.state import AgentState
+from agent.execution.executor import StepExecutor
+from tools.base import Tool
+
+
+def test_budget_never_ends_after_the_parent():
+    parent = Deadline.after(10)
+
+    assert parent.budget(seconds=60).at == parent.at
+    assert parent.budget(seconds=1).remaining() <= 1
+    assert parent.budget(fraction=0.5).remaining() <= 5.01
+    assert parent.budget(reserve=4).at == pytest.approx(parent.at - 4)
+
+
+def test_expired_deadline_has_no_time_left():
+    deadline = Deadline(time.monotonic() - 1)
+
+    assert deadline.expired
+    assert deadline.remaining() == 0.0
+    assert deadline.timeout(5) == 0.0
+
+
+def test_scope_can_only_shorten_the_deadline():
+    outer = Deadline.after(1)
+    assert current_deadline() is None
+
+    with deadline_scope(outer):
+        assert current_deadline() is outer
+        with deadline_scope(Deadline.after(60)) as inner:
+            assert inner is outer
+        shorter = Deadline.after(0.5)
+        with deadline_scope(shorter):
+            assert current_deadline() is shorter
+        with deadline_scope(None):
+            assert current_deadline() is outer
+
+    assert current_deadline() is None
+
+
+def test_scope_is_inherited_by_tasks():
+    async def main():
+        deadline = Deadline.after(1)
+        with deadline_scope(deadline):
+            seen = await asyncio.create_task(asyncio.sleep(0, result=current_deadline()))
+        return deadline, seen
+
+    deadline, seen = asyncio.run(main())
+    assert seen is deadline
+
+
+def test_with_deadline_returns_the_result_in_time():
+    result = asyncio.run(with_deadline(asyncio.sleep(0, result="done"), Deadline.after(1), "x"))
+
+    assert result == "done"
+
+
+def test_with_deadline_without_a_deadline_just_awaits():
+    assert asyncio.run(with_deadline(asyncio.sleep(0, result=1), None, "x")) == 1
+
+
+def test_with_deadline_cancels_and_names_the_stage():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(DeadlineExceeded) as info:
+        asyncio.run(with_deadline(slow(), Deadline.after(0.05), "tool_call"))
+
+    assert info.value.stage == "tool_call"
+    assert cancelled == [True]
+
+
+def test_iterate_with_deadline_closes_the_generator():
+    closed = []
+
+    async def chunks():
+        try:
+            for n in range(100):
+                await asyncio.sleep(0.02)
+                yield n
+        finally:
+            closed.append(True)
+
+    async def main():
+        received = []
+        with pytest.raises(DeadlineExceeded) as info:
+            async for chunk in iterate_with_deadline(chunks(), Deadline.after(0.1), "summary"):
+                received.append(chunk)
+        return received, info.value.stage
+
+    received, stage = asyncio.run(main())
+
+    assert stage == "summary"
+    assert 0 < len(received) < 100
+    assert closed == [True]
+
+
+def test_iterate_with_deadline_yields_everything_in_time():
+    async def chunks():
+        for n in range(3):
+            yield n
+
+    async def main():
+        return [chunk async for chunk in iterate_with_deadline(chunks(), Deadline.after(1), "x")]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+
+
+class _BusyTool(Tool):
+    """A CPU-bound tool that holds the CPU without ever awaiting."""
+
+    cpu_bound = True
+
+    def __init__(self):
+        super().__init__(name="busy", description="Spins for a second")
+
+    async def execute(self, parameters):
+        end = time.monotonic() + 1.0
+        while time.monotonic() < end:
+            pass
+        return {"result": "done"}
+
+    def get_parameters_schema(self):
+        return {"type": "object", "properties": {}}
+
+    def get_example(self):
+        return "{}"
+
+
+def test_blocking_tool_respects_the_deadline():
+    executor = StepExecutor(tools_registry={"busy": _BusyTool()}, process_pool=None)
+    step = {"step_id": 1, "description": "Spin", "requires_tool": True,
+            "tool_name": "busy", "tool_parameters": {}}
+
+    async def main():
+        start = time.monotonic()
+        with deadline_scope(Deadline.after(0.2)):
+            with pytest.raises(DeadlineExceeded):
+                await executor.execute_step(step, AgentState())
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 0.6
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from agent.planning.fast_path import FastPathRouter
+from tools.calculator import Calculator
+
+
+@pytest.fixture(name="router")
+def router_fixture():
+    return FastPathRouter({"calculator": Calculator()})
+
+
+def _answer(router, task):
+    """Route ``task`` and run its one step, returning the templated summary."""
+    fast_plan = router.route(task)
+    assert fast_plan is not None, task
+    step = fast_plan.plan[0]
+    output = asyncio.run(Calculator().execute(step["tool_parameters"]))
+    return fast_plan.summarize(
+        [{"step": step, "result": {"status": "success", "output": output}}])
+
+
+def test_large_integers_keep_every_digit(router):
+    assert _answer(router, "What is 2^70?") == f"2^70 = {2 ** 70}"
+
+
+def test_arithmetic_summary(router):
+    assert _answer(router, "compute (12 + 30) * 2") == "(12 + 30) * 2 = 84"
+
+
+def test_compound_interest_summary(router):
+    summary = _answer(
+        router,
+        "Calculate the compound interest on $4,000 with 4.5% annual interest rate for 5 years.")
+
+    assert summary == "The compound interest on $4,000.00 at 4.5% per year for 5 years is $984.73."
+
+
+@pytest.mark.parametrize("task", ["2024-2025", "1999", "2024 roadmap", "summarize 3 + 4 papers"])
+def test_tasks_that_are_not_arithmetic_go_to_the_planner(router, task):
+    assert router.route(task) is None
+
+
+def test_error_output_falls_back_to_the_model(router):
+    fast_plan = router.route("compute 1/0")
+    step = fast_plan.plan[0]
+    output = asyncio.run(Calculator().execute(step["tool_parameters"]))
+
+    result = {"status": "success", "output": output}
+
+    assert fast_plan.summarize([{"step": step, "result": result}]) is None
+    assert router.stats()["model_summaries"] == 1
+
+
+def test_failed_step_falls_back_to_the_model(router):
+    fast_plan = router.route("What is 2^10?")
+    result = {
+        "status": "error",
+        "error": "Tool call exceeded the timeout of 3s",
+        "output": "Error executing tool calculator: Tool call exceeded the timeout of 3s",
+    }
+
+    assert fast_plan.summarize([{"step": fast_plan.plan[0], "result": result}]) is None
+
+
+@pytest.mark.parametrize("task", ["What is 9**9**9?", "What is 2^2^40?", "compute 2^(3+4)",
+                                  "what is 7^5000"])
+def test_power_chains_and_large_exponents_go_to_the_planner(router, task):
+    assert router.route(task) is None
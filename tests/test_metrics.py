@@ -0,0 +1,32 @@
+import json
+
+from agent.core.metrics import MetricsRegistry
+
+
+def test_overflow_quantiles_export_as_valid_json():
+    registry = MetricsRegistry()
+    for value in (0.001, 120.0, 300.0):
+        registry.observe("step_seconds", value)
+
+    exported = json.loads(registry.to_json(), parse_constant=_reject)
+    histogram = exported["histograms"][0]
+
+    assert histogram["p50"] == "+Inf"
+    assert histogram["buckets"][-1] == ["+Inf", 3]
+    assert histogram["buckets"][0] == [0.005, 1]
+
+
+def test_quantile_within_the_buckets():
+    registry = MetricsRegistry()
+    for value in (0.02, 0.02, 0.3):
+        registry.observe("tool_call_seconds", value, tool="calculator")
+
+    histogram = registry.snapshot()["histograms"][0]
+
+    assert histogram["p50"] == 0.025
+    assert histogram["p99"] == 0.5
+    assert histogram["labels"] == {"tool": "calculator"}
+
+
+def _reject(constant):
+    raise ValueError(f"Not valid JSON: {constant}")
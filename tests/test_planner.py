@@ -0,0 +1,12 @@
+from agent.planning.planner import TaskPlanner
+from tools.calculator import Calculator
+
+
+def test_tool_descriptions_are_one_line_in_the_system_prompt():
+    planner = TaskPlanner(tools_registry={"calculator": Calculator()})
+
+    prompt = planner._get_system_prompt()  # pylint: disable=protected-access
+    line = next(line for line in prompt.splitlines() if line.startswith("- calculator:"))
+
+    assert "trigonometric functions" in line
+    assert "  " not in line
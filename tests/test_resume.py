@@ -0,0 +1,81 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from agent.core.agent import Agent
+from agent.core.persistence import SQLiteStateStore
+from agent.execution.executor import StepExecutor
+
+
+@pytest.fixture(name="store_path")
+def store_path_fixture(tmp_path):
+    return str(tmp_path / "state.db")
+
+
+class _StepSpy:
+    """Records the ids of executed steps and makes the steps in ``crash`` raise."""
+
+    def __init__(self, monkeypatch, crash=()):
+        self.executed = []
+        self.crash = set(crash)
+        original = StepExecutor.execute_step
+
+        async def execute_step(executor, step, state, dependency_results=None, task_id=None):
+            self.executed.append(step["step_id"])
+            if step["step_id"] in self.crash:
+                raise RuntimeError("process died")
+            return await original(executor, step, state, dependency_results, task_id=task_id)
+
+        monkeypatch.setattr(StepExecutor, "execute_step", execute_step)
+
+
+def test_resume_only_runs_the_unfinished_steps(fake_model, monkeypatch, store_path):
+    spy = _StepSpy(monkeypatch, crash={3})
+    agent = Agent(state_store=SQLiteStateStore(store_path))
+    with pytest.raises(RuntimeError):
+        asyncio.run(agent.process_task("Think about 2**10"))
+    task_id = agent.state.current_task_id
+    assert sorted(spy.executed) == [1, 2, 3]
+
+    spy.executed.clear()
+    spy.crash.clear()
+    planner_calls = sum("planner" in system for system, _ in fake_model)
+    resumed = Agent(state_store=SQLiteStateStore(store_path))
+    result = asyncio.run(resumed.resume_task(task_id))
+
+    assert spy.executed == [3]
+    assert sum("planner" in system for system, _ in fake_model) == planner_calls
+    assert result["status"] == "completed"
+    assert [entry["step"]["step_id"] for entry in result["results"]] == [1, 2, 3]
+    assert result["results"][1]["result"]["output"] == {"result": 1024}
+
+
+def test_resuming_a_completed_task_returns_the_stored_response(fake_model, store_path):
+    agent = Agent(state_store=SQLiteStateStore(store_path))
+    first = asyncio.run(agent.process_task("Think about 2**10"))
+    task_id = agent.state.current_task_id
+    calls = len(fake_model)
+
+    resumed = Agent(state_store=SQLiteStateStore(store_path))
+    second = asyncio.run(resumed.resume_task(task_id))
+
+    assert len(fake_model) == calls
+    assert second["status"] == "completed"
+    assert second["final_response"] == first["final_response"]
+    assert second["results"] == first["results"]
+
+
+def test_stores_without_the_final_response_column_are_migrated(store_path):
+    with sqlite3.connect(store_path) as connection:
+        connection.execute(
+            "CREATE TABLE tasks (id TEXT PRIMARY KEY, description TEXT NOT NULL, "
+            "status TEXT NOT NULL, plan TEXT NOT NULL, current_step INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        connection.execute(
+            "INSERT INTO tasks VALUES ('old', 'an old task', 'completed', '[]', 0, 0, 0)")
+
+    row = SQLiteStateStore(store_path).load_task("old")
+
+    assert row["description"] == "an old task"
+    assert row["final_response"] is None
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from agent.execution.scheduler import PlanScheduler
+
+
+def _step(step_id, depends_on=()):
+    return {"step_id": step_id, "depends_on": list(depends_on)}
+
+
+class _Recorder:
+    """Step runner that records the order steps start and finish in."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.events = []
+        self.dependencies = {}
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, step, dependency_results):
+        self.events.append(("start", step["step_id"]))
+        self.dependencies[step["step_id"]] = dependency_results
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        self.events.append(("end", step["step_id"]))
+        return {"status": "success", "output": step["step_id"] * 10}
+
+
+def test_steps_start_after_their_dependencies():
+    runner = _Recorder()
+    plan = [_step(1), _step(2), _step(3, [1, 2]), _step(4, [3])]
+
+    results = asyncio.run(PlanScheduler(runner).run(plan))
+
+    assert sorted(results) == [1, 2, 3, 4]
+    events = runner.events
+    assert events.index(("start", 3)) > max(events.index(("end", 1)), events.index(("end", 2)))
+    assert events.index(("start", 4)) > events.index(("end", 3))
+    assert runner.max_running == 2
+
+
+def test_runner_only_receives_its_own_dependencies():
+    runner = _Recorder()
+    plan = [_step(1), _step(2), _step(3, [2])]
+
+    asyncio.run(PlanScheduler(runner).run(plan))
+
+    assert runner.dependencies[1] == {}
+    assert list(runner.dependencies[3]) == [2]
+    assert runner.dependencies[3][2]["output"] == 20
+
+
+def test_concurrency_is_capped():
+    runner = _Recorder()
+    plan = [_step(step_id) for step_id in range(1, 7)]
+
+    asyncio.run(PlanScheduler(runner, max_concurrency=2).run(plan))
+
+    assert runner.max_running == 2
+
+
+def test_completed_steps_are_not_run_again():
+    runner = _Recorder()
+    completed = {1: {"status": "success", "output": "stored"}}
+    plan = [_step(1), _step(2, [1])]
+
+    results = asyncio.run(PlanScheduler(runner).run(plan, completed=completed))
+
+    assert ("start", 1) not in runner.events
+    assert results[1]["output"] == "stored"
+    assert runner.dependencies[2] == {1: completed[1]}
+
+
+def test_steps_are_scheduled_while_the_plan_streams_in():
+    runner = _Recorder()
+    started_before_plan_ended = []
+
+    async def plan():
+        yield _step(1)
+        await asyncio.sleep(0.05)
+        started_before_plan_ended.extend(runner.events)
+        yield _step(2, [1])
+
+    results = asyncio.run(PlanScheduler(runner).run(plan()))
+
+    assert sorted(results) == [1, 2]
+    assert ("start", 1) in started_before_plan_ended
+
+
+def test_a_failing_step_cancels_the_others():
+    cancelled = []
+
+    async def run_step(step, _dependency_results):
+        if step["step_id"] == 1:
+            raise RuntimeError("boom")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(step["step_id"])
+            raise
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(PlanScheduler(run_step).run([_step(2), _step(1)]))
+    assert cancelled == [2]
+
+
+def test_max_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        PlanScheduler(_Recorder(), max_concurrency=0)
@@ -0,0 +1,58 @@
+import pytest
+
+from agent.planning.similarity import SimilarPlanCache, extract_template
+
+
+def _plan(expression):
+    return [{
+        "step_id": 1, "description": "Compute the interest", "requires_tool": True,
+        "tool_name": "calculator", "tool_parameters": {"expression": expression},
+        "depends_on": [],
+    }]
+
+
+def test_template_replaces_numbers_percentages_and_names():
+    template, slots = extract_template("Search for Python news then write 3 points at 5%")
+
+    assert template == "search for <ent> news then write <num> points at <pct>"
+    assert slots == [("ent", "Python"), ("num", 3.0), ("pct", 5.0)]
+
+
+def test_plan_is_refilled_for_a_task_with_other_values():
+    cache = SimilarPlanCache()
+    cache.add("Calculate the simple interest on 4000 at 5% for 3 years", _plan("4000 * 0.05 * 3"))
+
+    plan = cache.lookup("Calculate the simple interest on 7000 at 2% for 6 years")
+
+    assert plan[0]["tool_parameters"] == {"expression": "7000 * 0.02 * 6"}
+    assert cache.stats()["hits"] == 1
+
+
+_SAVINGS = (
+    "for a small business owner with a savings account, over a period of 3 years at 5% per "
+    "year, starting from a deposit of 4000 dollars")
+
+
+@pytest.mark.parametrize("stored, task", [
+    (f"Calculate the simple interest earned {_SAVINGS}",
+     f"Calculate the compound interest earned {_SAVINGS}"),
+    (f"Calculate the interest earned with annual compounding {_SAVINGS}",
+     f"Calculate the interest earned with monthly compounding {_SAVINGS}"),
+    (f"Calculate the interest earned {_SAVINGS}, then write a short report",
+     f"Calculate the interest earned {_SAVINGS}, then do not write a short report"),
+])
+def test_plans_are_not_reused_when_other_words_differ(stored, task):
+    cache = SimilarPlanCache()
+    cache.add(stored, _plan("4000 * 0.05 * 3"))
+
+    assert cache.lookup(task) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_plans_are_not_shared_across_namespaces():
+    cache = SimilarPlanCache()
+    cache.add("Calculate the simple interest on 4000 at 5% for 3 years",
+              _plan("4000 * 0.05 * 3"), namespace="a")
+
+    assert cache.lookup("Calculate the simple interest on 7000 at 2% for 6 years",
+                        namespace="b") is None
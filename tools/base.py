@@ -1,9 +1,38 @@
 """Base class for all tools."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional
+import re
+
+class FastPathRule:
+    """A pattern for tasks that this tool can answer directly, without planning.
+
+    ``pattern`` must match the whole task description (case-insensitive, with
+    whitespace collapsed and trailing punctuation removed). ``build_parameters``
+    turns the match into the tool's parameters, or returns None to decline the
+    task. ``summary_template`` is formatted with the named groups of the match,
+    numbers converted to floats, and the tool output's ``result`` to give the final
+    response; without it the final response is generated by the model as usual.
+    """
+
+    def __init__(
+            self, name: str, pattern: str,
+            build_parameters: Callable[["re.Match"], Optional[Dict[str, Any]]],
+            summary_template: Optional[str] = None):
+        self.name = name
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.build_parameters = build_parameters
+        self.summary_template = summary_template
+
 
 class Tool(ABC):
+    # CPU-bound tools run in a worker process when a process pool is configured, so
+    # they cannot block the event loop; they must be constructible without arguments
+    cpu_bound = False
+    # True on the copies built inside worker processes, where an error such as
+    # MemoryError can be left to kill the worker instead of being reported
+    in_worker = False
+
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
@@ -27,3 +56,7 @@ class Tool(ABC):
     @abstractmethod
     def get_example(self) -> str:
         """Get an example of how to use the tool"""
+
+    def get_fast_path_rules(self) -> List[FastPathRule]:
+        """Get rules for tasks this tool can answer on its own, skipping the planner"""
+        return []
@@ -4,20 +4,74 @@ import ast
 import math
 import operator
 import json
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
-from .base import Tool
+import numpy as np
+
+from .base import FastPathRule, Tool
+
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+_NUMBER = r"\d[\d,]*(?:\.\d+)?"
+
+# Largest integer power, in bits, the calculator computes; 9**9**9 would need about
+# a billion bits and hold the CPU for minutes
+MAX_POWER_BITS = 10_000
+
+def _power(base: Any, exponent: Any) -> Any:
+    """``base ** exponent``, refusing integer powers larger than ``MAX_POWER_BITS``."""
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 \
+            and abs(base) > 1 and math.log2(abs(base)) * exponent > MAX_POWER_BITS:
+        raise ValueError(f"A power with exponent {exponent} is too large to compute")
+    return operator.pow(base, exponent)
+
+# Largest constant exponent the arithmetic fast path accepts
+_MAX_FAST_PATH_EXPONENT = 1000
+
+def _compound_interest_parameters(match) -> Dict[str, Any]:
+    principal = match.group("principal").replace(",", "")
+    rate = match.group("rate")
+    years = match.group("years")
+    return {"expression": f"{principal} * (1 + {rate} / 100) ** {years} - {principal}"}
+
+def _arithmetic_parameters(match) -> Optional[Dict[str, Any]]:
+    expression = match.group("expression").replace("^", "**").strip()
+    # Only real arithmetic: at least one operator between numbers
+    if not any(op in expression for op in "+-*/") or not any(c.isdigit() for c in expression):
+        return None
+    # Without a leading verb, a bare hyphen is more likely a range or a date
+    # ("2024-2025") than a subtraction
+    if match.group("verb") is None and not any(op in expression for op in "+*/") \
+            and " - " not in expression:
+        return None
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        return None
+    # Power chains and large exponents (9**9**9) are left to the planner
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            exponent = node.right
+            if not isinstance(exponent, ast.Constant) \
+                    or abs(exponent.value) > _MAX_FAST_PATH_EXPONENT:
+                return None
+    return {"expression": expression}
 
 
 class Calculator(Tool):
     """A tool for performing mathematical calculations with support for basic arithmetic,
     trigonometric functions, and logarithms."""
 
-    def __init__(self):
+    # Expressions such as 9**9**9 can take arbitrarily long to evaluate
+    cpu_bound = True
+
+    def __init__(self, cache_size: int = 256, max_grid_size: int = 1_000_000):
         super().__init__(
             name="calculator",
             description="""Performs mathematical calculations. Supports basic arithmetic,
-            trigonometric functions, logarithms, etc.""",
+            trigonometric functions, logarithms, etc. Named variables can be bound to lists
+            of values to evaluate the expression over the whole grid in a single call.""",
         )
 
         # Define safe operations
@@ -26,7 +80,7 @@ class Calculator(Tool):
             ast.Sub: operator.sub,
             ast.Mult: operator.mul,
             ast.Div: operator.truediv,
-            ast.Pow: operator.pow,
+            ast.Pow: _power,
             ast.USub: operator.neg,
             ast.Mod: operator.mod,
         }
@@ -43,6 +97,25 @@ class Calculator(Tool):
             "round": round,
         }
 
+        # Array equivalents of the whitelisted functions for grid evaluation
+        self.array_functions = {
+            "sin": np.sin,
+            "cos": np.cos,
+            "tan": np.tan,
+            "sqrt": np.sqrt,
+            "log": np.log,
+            "log10": np.log10,
+            "exp": np.exp,
+            "abs": np.abs,
+            "round": np.round,
+        }
+
+        # Compiled expressions keyed by expression, bound variable names and mode,
+        # least recently used first
+        self.cache_size = cache_size
+        self.max_grid_size = max_grid_size
+        self._compiled: "OrderedDict[Tuple[str, Tuple[str, ...], bool], Callable]" = OrderedDict()
+
     def get_example(self) -> str:
         """Return an example of how to use the calculator tool."""
         example = {
@@ -50,6 +123,35 @@ class Calculator(Tool):
         }
         return json.dumps(example)
 
+    def get_fast_path_rules(self) -> List[FastPathRule]:
+        """Compound interest questions and bare arithmetic need no planning."""
+        return [
+            FastPathRule(
+                name="compound_interest",
+                pattern=(
+                    r"(?:calculate |compute |what is )?(?:the )?compound interest (?:on|for) "
+                    rf"\$?(?P<principal>{_NUMBER})(?: dollars)? (?:with|at) (?:an? )?"
+                    rf"(?P<rate>{_NUMBER}) ?% (?:annual |yearly )?(?:interest )?(?:rate )?"
+                    rf"(?:for|over) (?P<years>{_NUMBER}) years?"
+                ),
+                build_parameters=_compound_interest_parameters,
+                summary_template=(
+                    "The compound interest on ${principal:,.2f} at {rate:g}% per year for "
+                    "{years:g} years is ${result:,.2f}."
+                ),
+            ),
+            FastPathRule(
+                name="arithmetic",
+                pattern=(
+                    r"(?P<verb>what is |what's |calculate |compute |evaluate )?"
+                    r"(?P<expression>[\d.\s()+\-*/^]+)"
+                ),
+                build_parameters=_arithmetic_parameters,
+                # The result as computed, so large integers keep every digit
+                summary_template="{expression} = {result}",
+            ),
+        ]
+
     def get_parameters_schema(self) -> Dict[str, Any]:
         return {
             "type": "object",
@@ -57,7 +159,21 @@ class Calculator(Tool):
                 "expression": {
                     "type": "string",
                     "description": "Mathematical expression to evaluate",
-                }
+                },
+                "bindings": {
+                    "type": "object",
+                    "description": (
+                        "Optional values for named variables in the expression. A list of "
+                        "values evaluates the expression over every combination, e.g. "
+                        '{"r": [0.03, 0.04], "n": [5, 10]} for "1000*(1+r)**n"'
+                    ),
+                    "additionalProperties": {
+                        "anyOf": [
+                            {"type": "number"},
+                            {"type": "array", "items": {"type": "number"}},
+                        ]
+                    },
+                },
             },
             "required": ["expression"],
         }
@@ -66,46 +182,146 @@ class Calculator(Tool):
         """Safely evaluate a mathematical expression"""
         expression = parameters.get("expression", "")
 
+        bindings = parameters.get("bindings") or {}
+
         if not expression:
             return {"error": "No expression provided"}
+        if not isinstance(bindings, dict):
+            return {"error": "Bindings must be an object mapping variable names to values"}
 
         try:
-            return {"result": self._evaluate(expression)}
+            if any(isinstance(value, (list, tuple)) for value in bindings.values()):
+                return self._evaluate_grid(expression, bindings)
+            return {"result": self._evaluate(expression, bindings)}
         except (ValueError, SyntaxError, TypeError) as e:
             return {"error": f"Error evaluating expression: {str(e)}"}
 
-    def _evaluate(self, expression: str) -> float:
-        """Safely evaluate a mathematical expression using ast"""
+    def _evaluate(self, expression: str, bindings: Dict[str, Any] = None) -> float:
+        """Safely evaluate a mathematical expression using its compiled form"""
+        bindings = bindings or {}
         try:
-            # Parse expression
-            node = ast.parse(expression, mode="eval").body
-            return self._eval_node(node)
+            compiled = self._get_compiled(expression, tuple(sorted(bindings)), vectorized=False)
+            return compiled(bindings)
+        except MemoryError as e:
+            if self.in_worker:
+                # Left to the process pool, which replaces a worker that ran out of memory
+                raise
+            raise ValueError("Expression needs too much memory") from e
         except Exception as e:
             raise ValueError(f"Invalid expression: {str(e)}") from e
 
-    def _eval_node(self, node):
-        """Recursively evaluate an AST node"""
+    def _evaluate_grid(self, expression: str, bindings: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate an expression over the grid of all list-valued bindings at once.
+
+        Each list-valued binding becomes one axis of the result, in the order given.
+        Values are broadcast against each other instead of materializing the grid
+        for every variable, so the whole grid is computed in one NumPy pass. Points
+        that scalar evaluation would reject are null in ``result`` and true in the
+        ``invalid`` mask; if every point is invalid, ``ValueError`` is raised.
+        """
+        axes: List[str] = [
+            name for name, value in bindings.items() if isinstance(value, (list, tuple))]
+        grid_size = 1
+        for name in axes:
+            grid_size *= len(bindings[name])
+        if grid_size > self.max_grid_size:
+            raise ValueError(
+                f"Grid of {grid_size} points exceeds the limit of {self.max_grid_size}")
+
+        env = {}
+        for name, value in bindings.items():
+            if name in axes:
+                shape = [1] * len(axes)
+                shape[axes.index(name)] = len(value)
+                env[name] = np.asarray(value, dtype=np.float64).reshape(shape)
+            else:
+                env[name] = float(value)
+
+        try:
+            compiled = self._get_compiled(expression, tuple(sorted(bindings)), vectorized=True)
+            with np.errstate(all="ignore"):
+                result = np.broadcast_to(
+                    compiled(env), tuple(len(bindings[name]) for name in axes))
+        except MemoryError as e:
+            if self.in_worker:
+                raise
+            raise ValueError("Expression needs too much memory") from e
+        except Exception as e:
+            raise ValueError(f"Invalid expression: {str(e)}") from e
+
+        # Points where scalar evaluation would fail (division by zero, log of a
+        # negative number, overflow) come out of NumPy as inf or nan
+        finite = np.isfinite(result)
+        if not finite.any():
+            raise ValueError("Invalid expression: no point of the grid has a finite result")
+        output = {
+            "result": np.where(finite, result, None).tolist(),
+            "shape": list(result.shape),
+            "axes": axes,
+        }
+        if not finite.all():
+            output["invalid"] = (~finite).tolist()
+        return output
+
+    def _get_compiled(
+            self, expression: str, variables: Tuple[str, ...],
+            vectorized: bool) -> Callable[[Dict[str, Any]], Any]:
+        """Return the compiled expression from the LRU cache, compiling it on a miss"""
+        key = (expression, variables, vectorized)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+            return compiled
+
+        for name in variables:
+            if name in self.functions or name in CONSTANTS:
+                raise ValueError(f"Variable name {name} is reserved")
+
+        functions = self.array_functions if vectorized else self.functions
+        node = ast.parse(expression, mode="eval").body
+        compiled = self._compile_node(node, functions, variables)
+        self._compiled[key] = compiled
+        if len(self._compiled) > self.cache_size:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def _compile_node(
+            self, node, functions: Dict[str, Callable],
+            variables: Tuple[str, ...]) -> Callable[[Dict[str, Any]], Any]:
+        """Validate an AST node against the whitelist and turn it into a closure.
+
+        The closure takes a dict with the values of the bound ``variables``.
+        """
         if isinstance(node, ast.Constant):
-            return node.value
+            value = node.value
+            return lambda env: value
         if isinstance(node, (ast.BinOp, ast.UnaryOp)):
             if type(node.op) not in self.operators:
                 raise ValueError(f"Unsupported operation: {type(node.op).__name__}")
+            op = self.operators[type(node.op)]
             if isinstance(node, ast.BinOp):
-                return self.operators[type(node.op)](
-                    self._eval_node(node.left), self._eval_node(node.right)
-                )
-            return self.operators[type(node.op)](self._eval_node(node.operand))
+                left = self._compile_node(node.left, functions, variables)
+                right = self._compile_node(node.right, functions, variables)
+                return lambda env: op(left(env), right(env))
+            operand = self._compile_node(node.operand, functions, variables)
+            return lambda env: op(operand(env))
         if isinstance(node, ast.Call):
             if not isinstance(node.func, ast.Name):
                 raise ValueError("Only simple function calls are supported")
             func_name = node.func.id
-            if func_name not in self.functions:
+            if func_name not in functions:
                 raise ValueError(f"Unsupported function: {func_name}")
-            args = [self._eval_node(arg) for arg in node.args]
-            return self.functions[func_name](*args)
+            if node.keywords:
+                raise ValueError("Keyword arguments are not supported")
+            func = functions[func_name]
+            args = [self._compile_node(arg, functions, variables) for arg in node.args]
+            return lambda env: func(*[arg(env) for arg in args])
         if isinstance(node, ast.Name):
-            constants = {"pi": math.pi, "e": math.e}
-            if node.id not in constants:
-                raise ValueError(f"Unknown variable: {node.id}")
-            return constants[node.id]
+            name = node.id
+            if name in variables:
+                return lambda env: env[name]
+            if name not in CONSTANTS:
+                raise ValueError(f"Unknown variable: {name}")
+            value = CONSTANTS[name]
+            return lambda env: value
         raise ValueError(f"Unsupported node type: {type(node).__name__}")
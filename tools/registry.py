@@ -0,0 +1,111 @@
+"""Registry that resolves tools by name and only loads them when they are first used."""
+
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Union
+import importlib
+import logging
+
+from .base import Tool
+
+logger = logging.getLogger(__name__)
+
+# Packages can contribute tools with an entry point in this group, e.g.
+# ``my_tool = my_package.tools:MyTool`` under ``[project.entry-points."agentic_ai.tools"]``
+ENTRY_POINT_GROUP = "agentic_ai.tools"
+
+BUILTIN_TOOLS = {
+    "calculator": "tools.calculator:Calculator",
+    "web_search": "tools.web_search:WebSearch",
+}
+
+ToolFactory = Union[str, Callable[[], Tool]]
+
+def load_object(path: str) -> Any:
+    """Import the object at a ``module:qualname`` path."""
+    module_name, _, qualname = path.partition(":")
+    target = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return target
+
+def _entry_points(group: str) -> List[Any]:
+    # pylint: disable=import-outside-toplevel
+    from importlib import metadata
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
+
+class ToolRegistry(MutableMapping[str, Tool]):
+    """Mapping of tool names to tools that builds each tool on first lookup.
+
+    Tools are registered as instances, as factories that take no arguments, or as
+    ``module:Class`` paths; factories and paths are only imported and called when
+    the tool is first looked up. Tools published under the ``agentic_ai.tools``
+    entry point group are discovered the first time the registry is listed or a
+    name is not found. Membership tests and listing names load nothing, while
+    ``items()`` and ``values()`` load every tool.
+    """
+
+    def __init__(
+            self, factories: Optional[Dict[str, ToolFactory]] = None,
+            entry_point_group: Optional[str] = None):
+        self._entries: Dict[str, Union[Tool, ToolFactory]] = dict(factories or {})
+        self._entry_point_group = entry_point_group
+
+    @classmethod
+    def with_defaults(cls) -> "ToolRegistry":
+        """A registry with the built-in tools and any installed tool plugins."""
+        return cls(BUILTIN_TOOLS, entry_point_group=ENTRY_POINT_GROUP)
+
+    def register_factory(self, name: str, factory: ToolFactory) -> None:
+        """Register a tool to be built by ``factory`` when it is first used."""
+        self._entries[name] = factory
+
+    def is_loaded(self, name: str) -> bool:
+        """Whether the tool has been built already."""
+        return isinstance(self._entries.get(name), Tool)
+
+    def _discover(self) -> None:
+        """Add the tools published as entry points, once."""
+        group, self._entry_point_group = self._entry_point_group, None
+        if group is None:
+            return
+        for entry_point in _entry_points(group):
+            if entry_point.name in self._entries:
+                logger.warning(
+                    "Ignoring tool plugin %s: the name is already registered", entry_point.name)
+                continue
+            self._entries[entry_point.name] = lambda ep=entry_point: ep.load()()
+            logger.debug("Discovered tool plugin %s", entry_point.name)
+
+    def __getitem__(self, name: str) -> Tool:
+        if name not in self._entries:
+            self._discover()
+        entry = self._entries[name]
+        if isinstance(entry, Tool):
+            return entry
+        factory = load_object(entry) if isinstance(entry, str) else entry
+        tool = factory()
+        self._entries[name] = tool
+        logger.debug("Loaded tool %s", name)
+        return tool
+
+    def __setitem__(self, name: str, tool: Tool) -> None:
+        self._entries[name] = tool
+
+    def __delitem__(self, name: str) -> None:
+        del self._entries[name]
+
+    def __contains__(self, name: object) -> bool:
+        if name not in self._entries:
+            self._discover()
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._entries)
@@ -0,0 +1,68 @@
+"""Validation of tool parameters against the JSON schemas tools declare."""
+
+from typing import Any, Dict, List
+
+_TYPES = {
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+    "null": type(None),
+}
+
+def _is_type(value: Any, type_name: str) -> bool:
+    expected = _TYPES.get(type_name)
+    if expected is None:
+        return True
+    # bool is a subclass of int, but JSON keeps them apart
+    if isinstance(value, bool) and type_name in ("number", "integer"):
+        return False
+    return isinstance(value, expected)
+
+def _check(schema: Dict[str, Any], value: Any, path: str) -> List[str]:
+    if "anyOf" in schema:
+        if any(not _check(option, value, path) for option in schema["anyOf"]):
+            return []
+        return [f"{path} does not match any allowed form"]
+
+    errors = []
+    types = schema.get("type")
+    if types is not None:
+        types = [types] if isinstance(types, str) else types
+        if not any(_is_type(value, type_name) for type_name in types):
+            return [f"{path} should be of type {' or '.join(types)}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path} should be one of {schema['enum']}")
+
+    if isinstance(value, dict):
+        errors.extend(_check_object(schema, value, path))
+    elif isinstance(value, list) and isinstance(schema.get("items"), dict):
+        for index, item in enumerate(value):
+            errors.extend(_check(schema["items"], item, f"{path}[{index}]"))
+    return errors
+
+def _check_object(schema: Dict[str, Any], value: Dict[str, Any], path: str) -> List[str]:
+    errors = [
+        f"{path}.{name} is required" for name in schema.get("required", []) if name not in value]
+    properties = schema.get("properties", {})
+    additional = schema.get("additionalProperties", True)
+    for name, item in value.items():
+        if name in properties:
+            errors.extend(_check(properties[name], item, f"{path}.{name}"))
+        elif additional is False:
+            errors.append(f"{path}.{name} is not an allowed parameter")
+        elif isinstance(additional, dict):
+            errors.extend(_check(additional, item, f"{path}.{name}"))
+    return errors
+
+def validate_parameters(schema: Dict[str, Any], parameters: Any) -> List[str]:
+    """Check ``parameters`` against a tool's parameters schema.
+
+    Supports the subset of JSON Schema that tools use: ``type``, ``properties``,
+    ``required``, ``additionalProperties``, ``items``, ``enum`` and ``anyOf``.
+    Returns a list of problems, empty when the parameters are valid.
+    """
+    return _check(schema, parameters, "parameters")
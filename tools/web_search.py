@@ -1,19 +1,131 @@
-from typing import Dict, Any
+"""A web search tool with pluggable, non-blocking search backends."""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+import asyncio
 import json
-from googleapiclient.discovery import build
+import logging
+import threading
+
+import httpx
 
 from config.settings import settings
 
 from .base import Tool
 
+logger = logging.getLogger(__name__)
+
+class SearchError(Exception):
+    """Raised by a search backend when a search request fails."""
+
+class SearchBackend(ABC):
+    """A source of search results in the Custom Search JSON format."""
+
+    @abstractmethod
+    async def search(self, query: str, num: int) -> Dict[str, Any]:
+        """Run a search and return the response, with results under ``items``"""
+
+    async def aclose(self) -> None:
+        """Release any resources held by the backend"""
+
+
+class GoogleSearchBackend(SearchBackend):
+    """Google Custom Search API backend.
+
+    The discovery-based client is blocking, so requests run on a bounded thread
+    pool instead of the event loop. Service objects are not thread-safe; each
+    worker thread builds its own once and reuses it for every later request.
+    """
+
+    def __init__(self, api_key: str, search_engine_id: str, max_workers: int = 4):
+        self.api_key = api_key
+        self.search_engine_id = search_engine_id
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="web-search")
+        self._local = threading.local()
+
+    def _get_service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            # Imported here so the discovery client is only loaded when it is used
+            from googleapiclient.discovery import build  # pylint: disable=import-outside-toplevel
+
+            logger.debug("Building Custom Search service for %s", threading.current_thread().name)
+            service = build("customsearch", "v1", developerKey=self.api_key)
+            self._local.service = service
+        return service
+
+    def _search_sync(self, query: str, num: int) -> Dict[str, Any]:
+        # pylint: disable=import-outside-toplevel
+        from googleapiclient.errors import Error
+        from httplib2 import HttpLib2Error
+
+        try:
+            # The discovery client builds its resource methods at runtime
+            return self._get_service().cse().list(  # pylint: disable=no-member
+                q=query,
+                cx=self.search_engine_id,
+                num=num
+            ).execute()
+        except (Error, HttpLib2Error, OSError) as e:
+            raise SearchError(str(e)) from e
+
+    async def search(self, query: str, num: int) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._search_sync, query, num)
+
+    async def aclose(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class HttpSearchBackend(SearchBackend):
+    """Backend for any HTTP server that answers ``GET endpoint?q=...&num=...`` with
+    Custom Search style JSON, such as a local stand-in server for tests and benchmarks."""
+
+    def __init__(self, endpoint: str, timeout: float = 10.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def search(self, query: str, num: int) -> Dict[str, Any]:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        try:
+            response = await self._client.get(self.endpoint, params={"q": query, "num": num})
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise SearchError(str(e)) from e
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_search_backend() -> SearchBackend:
+    """Build the search backend selected by ``settings.search_backend``."""
+    if settings.search_backend == "http":
+        if not settings.search_endpoint:
+            raise ValueError("SEARCH_ENDPOINT must be set to use the http search backend")
+        return HttpSearchBackend(settings.search_endpoint)
+    if settings.search_backend == "google":
+        return GoogleSearchBackend(
+            api_key=settings.google_api_key,
+            search_engine_id=settings.search_engine_id,
+            max_workers=settings.search_max_workers,
+        )
+    raise ValueError(f"Unknown search backend: {settings.search_backend}")
+
+
 class WebSearch(Tool):
-    def __init__(self):
+    def __init__(self, backend: Optional[SearchBackend] = None):
         super().__init__(
             name="web_search",
             description="Performs web searches using Google Custom Search API"
         )
-        self.api_key = settings.GOOGLE_API_KEY
-        self.search_engine_id = settings.SEARCH_ENGINE_ID
+        self.backend = backend or create_search_backend()
 
     def get_parameters_schema(self) -> Dict[str, Any]:
         return {
@@ -31,7 +143,7 @@ class WebSearch(Tool):
         return json.dumps({"query": "latest developments in AI"})
 
     async def execute(self, parameters: Dict[str, Any]) -> Any:
-        """Execute a web search using Google Custom Search API."""
+        """Execute a web search without blocking the event loop."""
         try:
 
             # Get the search query from parameters
@@ -39,18 +151,8 @@ class WebSearch(Tool):
             if not query:
                 return {"error": "No search query provided"}
 
-            # Create a service object for the Custom Search API
-            service = build(
-                "customsearch", "v1",
-                developerKey=self.api_key
-            )
-
             # Execute the search
-            result = service.cse().list(
-                q=query,
-                cx=self.search_engine_id,
-                num=5  # Number of results to return
-            ).execute()
+            result = await self.backend.search(query, num=5)  # Number of results to return
 
             # Format the results
             formatted_results = []
@@ -65,5 +167,5 @@ class WebSearch(Tool):
                 "results": formatted_results
             }
 
-        except (AttributeError, TypeError) as e:
+        except (AttributeError, TypeError, SearchError) as e:
             return {"error": f"Search failed: {str(e)}"}